@@ -0,0 +1,197 @@
+#----------------------------------------------------------------------#
+# Benchmark.py
+#
+# Throughput benchmark of the headless simulator. Runs a fixed set of
+# fixed seed scenarios (SRPTE and class based scheduling, loads 0.5,
+# 0.9 and 0.99, exponential and Bounded Pareto alpha 1.1 and 1.5 sizes,
+# 2, 10 and 50 classes), each in a fresh process one after the other,
+# and reports events per second, peak resident memory and the time
+# spent in each phase of the run. Results are written as JSON together
+# with the code version, so runs of different versions can be compared
+# with --baseline.
+#
+# Usage:
+#	python Benchmark.py --output bench.json
+#	python Benchmark.py --filter Class10 --repeat 3 --baseline bench.json
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import argparse
+from datetime import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from Progress import peakMemory
+from SimEngine import SEED, ClassBasedMachine, SRPTEMachine
+from SimParams import OutputOptions, Scenario
+
+BENCH_LOADS = (0.5, 0.9, 0.99)
+BENCH_SIZES = (('Exp', 'Exponential', None), ('BP1.1', 'Bounded Pareto', 1.1), ('BP1.5', 'Bounded Pareto', 1.5))
+BENCH_CLASSES = (2, 10, 50)
+BENCH_SIM_LENGTH = 500000.0
+
+
+#----------------------------------------------------------------------#
+# Function: benchmarkScenarios
+#
+# Returns the scenarios (dicts) in a fixed order. Names look like
+# SRPTE-load0.9-BP1.5 or Class10-load0.99-Exp and stay the same across
+# versions, so results can be matched by name.
+#
+#----------------------------------------------------------------------#
+def benchmarkScenarios(simLength = BENCH_SIM_LENGTH):
+	scenarios = []
+	for scheduler, classes in (('SRPTE', (None,)), ('Class', BENCH_CLASSES)):
+		for numClasses in classes:
+			for load in BENCH_LOADS:
+				for sizeName, procDist, alpha in BENCH_SIZES:
+					name = "%s%s-load%s-%s"%(scheduler, '' if numClasses is None else numClasses, load, sizeName)
+					scenarios.append({'name' : name, 'scheduler' : scheduler, 'numClasses' : numClasses,
+									'load' : load, 'procDist' : procDist, 'alpha' : alpha, 'simLength' : simLength})
+	return scenarios
+
+
+# Runs one scenario and returns its measurements. Called in a fresh
+# worker process, so the peak memory is that of this scenario alone.
+# With profile=True the event loop phases are timed as well (which
+# slows the run down, so events per second are not comparable).
+def runScenario(scenario, seed = SEED, profile = False):
+	start = time.perf_counter()
+	S = Scenario(scheduler = scenario['scheduler'], load = scenario['load'], procDist = scenario['procDist'],
+				numClasses = scenario['numClasses'], simLength = scenario['simLength'], seed = seed)
+	if scenario['alpha'] is not None:
+		S = S._replace(alpha = scenario['alpha'])
+	output = OutputOptions(profile = profile)
+	if S.scheduler == 'SRPTE':
+		MC = SRPTEMachine(S, output)
+		runArgs = (S.load, S.arrDist, S.procRate, S.procDist, S.percErrorMin, S.percErrorMax, S.simLength)
+	else:
+		MC = ClassBasedMachine(S, output)
+		runArgs = (S.load, S.arrDist, S.procRate, S.procDist, S.percErrorMin, S.percErrorMax, S.numClasses, S.simLength)
+	setupEnd = time.perf_counter()
+	results = MC.run(*runArgs)
+	runEnd = time.perf_counter()
+
+	events = results['numArrivals'] + results['numCompleted']
+	row = dict(scenario,
+				seed = seed,
+				events = events,
+				wallTime = runEnd - start,
+				eventsPerSec = events/(runEnd - setupEnd),
+				peakRSS = peakMemory(),
+				phases = {'setup' : setupEnd - start, 'run' : runEnd - setupEnd},
+				avgNumJobs = results['avgNumJobs'])
+	if profile:
+		row['profile'] = results['profile']
+	return row
+
+
+# Short hash of the checked out commit, or None outside a git checkout
+def codeVersion():
+	try:
+		return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd = os.path.dirname(os.path.abspath(__file__)),
+										stderr = subprocess.DEVNULL).decode('ascii').strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+#----------------------------------------------------------------------#
+# Function: runBenchmark
+#
+# Runs each scenario `repeat` times, one run at a time so the runs do
+# not compete for cores, and keeps the fastest run of each (profiled
+# with profile=True, see runScenario). Returns the report: the
+# environment and one entry per scenario. progress, if given, is called
+# with (done, total, row) as each scenario finishes.
+#
+#----------------------------------------------------------------------#
+def runBenchmark(scenarios, seed = SEED, repeat = 1, progress = None, profile = False):
+	if repeat < 1:
+		raise ValueError("Need at least 1 repeat!")
+	rows = []
+	pool = multiprocessing.Pool(processes = 1, maxtasksperchild = 1)		# a new process per run
+	try:
+		for done, scenario in enumerate(scenarios, 1):
+			runs = [pool.apply(runScenario, (scenario, seed, profile)) for i in range(repeat)]
+			row = max(runs, key = lambda run: run['eventsPerSec'])
+			row['runWallTimes'] = [run['wallTime'] for run in runs]
+			rows.append(row)
+			if progress is not None:
+				progress(done, len(scenarios), row)
+	finally:
+		pool.close()
+		pool.join()
+
+	return {'version' : codeVersion(),
+			'date' : datetime.now().isoformat(timespec = 'seconds'),
+			'python' : platform.python_version(),
+			'platform' : platform.platform(),
+			'processor' : platform.processor(),
+			'seed' : seed,
+			'repeat' : repeat,
+			'profile' : profile,
+			'scenarios' : rows}
+
+
+def writeReport(report, path):
+	folder = os.path.dirname(path)
+	if folder:
+		os.makedirs(folder, exist_ok=True)
+	with open(path, 'w') as myFile:
+		json.dump(report, myFile, indent = 1)
+	return path
+
+
+# Events per second of each scenario relative to an earlier report,
+# {name: ratio} for the scenarios found in both
+def compareReports(report, baseline):
+	before = dict((row['name'], row) for row in baseline['scenarios'])
+	return dict((row['name'], row['eventsPerSec']/before[row['name']]['eventsPerSec'])
+				for row in report['scenarios'] if row['name'] in before)
+
+
+def parseArgs(argv):
+	parser = argparse.ArgumentParser(description="Measure the throughput of the headless simulator on fixed scenarios.")
+	parser.add_argument('--simLength', type=float, default=BENCH_SIM_LENGTH)
+	parser.add_argument('--seed', type=int, default=SEED)
+	parser.add_argument('--repeat', type=int, default=1, help="runs per scenario, the fastest is kept")
+	parser.add_argument('--filter', nargs='+', default=None, help="only run scenarios whose name contains one of these")
+	parser.add_argument('--output', default="./SINGLE_SERVER_RESULTS/benchmark.json")
+	parser.add_argument('--baseline', default=None, help="earlier report to compare events per second against")
+	parser.add_argument('--profile', action='store_true', help="also time the event loop phases of each scenario")
+	return parser.parse_args(argv)
+
+
+#----------------------------------------------------------------------#
+def main(argv = None):
+	args = parseArgs(argv)
+	scenarios = benchmarkScenarios(args.simLength)
+	if args.filter is not None:
+		scenarios = [scenario for scenario in scenarios if any(text in scenario['name'] for text in args.filter)]
+	if not scenarios:
+		print ("No scenarios match %s"%' '.join(args.filter))
+		return 1
+
+	def progress(done, total, row):
+		print ("%d/%d  %-24s %10.0f events/s  %8.1f MB  %.2fs"%(done, total, row['name'], row['eventsPerSec'],
+				(row['peakRSS'] or 0)/1048576.0, row['wallTime']))
+
+	report = runBenchmark(scenarios, seed = args.seed, repeat = args.repeat, progress = progress, profile = args.profile)
+	print ("Wrote %s"%writeReport(report, args.output))
+
+	if args.baseline is not None:
+		with open(args.baseline) as myFile:
+			baseline = json.load(myFile)
+		print ("Events per second relative to %s (version %s):"%(args.baseline, baseline.get('version')))
+		for name, ratio in compareReports(report, baseline).items():
+			print ("%-24s %6.3fx"%(name, ratio))
+	return 0
+
+
+if __name__ == '__main__': sys.exit(main())
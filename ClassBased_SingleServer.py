@@ -17,9 +17,12 @@ from tkinter import filedialog
 from datetime import datetime
 
 from math import log
-import plotly.plotly as py
-from plotly.graph_objs import Scatter
-import plotly.graph_objs as go
+try:
+	import plotly.plotly as py
+	from plotly.graph_objs import Scatter
+	import plotly.graph_objs as go
+except ImportError:		# plots are skipped
+	py = None
 #from bokeh.plotting import figure, output_file, show
 #from bokeh.charts import Bar, output_file, show
 #from collections import OrderedDict
@@ -30,13 +33,18 @@ import csv
 import operator
 
 import sqlite3
-import pandas
+try:
+	import pandas
+except ImportError:		# parameters are not saved
+	pandas = None
 
-conn=sqlite3.connect('SingleServerDatabase_ASRPTE.db')
+from ConsoleFeed import CONSOLE_MAX_LINES, CONSOLE_POLL_MS, ConsoleFeed, SimulationThread, showLines, windowOptions
+from EventLog import LOG_LEVELS
+from Profiler import formatProfile
+from Progress import formatProgress
+from SimEngine import ClassBasedMachine
 
-NumJobs = []
-AvgNumJobs = []
-NumJobsTime = []
+DATABASE = 'SingleServerDatabase_ASRPTE.db'
 
 #----------------------------------------------------------------------#
 # Class: GUI
@@ -52,7 +60,16 @@ class GUI(Tk):
 		global SEED
 		#SEED = random.randint(0, 1000000000)
 		SEED = 994863731
-		random.seed(SEED)
+		self.rng = random.Random(SEED)		# shared by the runs started from this window
+		self.MC = None					# machine of the current run
+		self.runResults = None			# results returned by the last run
+		self.BPArray = []				# last Bounded Pareto parameters, kept between runs
+		self.customEquation = ""		# last custom distribution, kept between runs
+		self.simThread = None			# worker thread of the current run
+		self.feed = ConsoleFeed()		# console lines waiting for the Tk thread
+		self.logLevel = 'debug'			# events written to the console ('off', 'info' or 'debug'), set from the Input dropdown
+		self.progressReport = None		# latest progress of the current run, shown by pollConsole
+		self.profile = False			# time the phases of each run and print them at the end, set from the Input checkbox
 		
 
 		# Create the input frame
@@ -83,6 +100,7 @@ class GUI(Tk):
 		self.consoleFrame = Frame(self.frameOut)
 		self.console = Text(self.consoleFrame, wrap = WORD)		
 		self.makeConsole()
+		self.after(CONSOLE_POLL_MS, self.pollConsole)
 		self.printIntro()
 		self.updateStatusBar("Waiting for submit...")
 
@@ -102,12 +120,60 @@ class GUI(Tk):
 		self.grid_rowconfigure(0, weight=1)
 
 
+	# Safe to call from the simulation thread; lines reach the console
+	# the next time pollConsole runs
 	def writeToConsole(self, text = ' '):
-		self.console.config(state=NORMAL)       # make console editable
-		self.console.insert(END, '%s\n'%text)
-		self.update()
-		self.console.yview(END)					# auto-scroll		
-		self.console.config(state=DISABLED)     # disable (non-editable) console
+		self.feed.write(text)
+
+	# Safe to call from the simulation thread, like writeToConsole
+	def setProgress(self, report):
+		self.progressReport = report
+
+	# Runs on the Tk thread every CONSOLE_POLL_MS: shows a batch of the
+	# queued lines and the latest progress, and finishes a run whose
+	# thread has ended
+	def pollConsole(self):
+		self.after(CONSOLE_POLL_MS, self.pollConsole)
+		lines, dropped = self.feed.drain()
+		if dropped:
+			lines.insert(0, "... %d lines skipped ..."%dropped)
+		if lines:
+			showLines(self.console, lines, CONSOLE_MAX_LINES)
+		report = self.progressReport
+		if (report != None):
+			self.progressReport = None
+			self.updateStatusBar(formatProgress(report))
+		if (self.simThread != None) and (not self.simThread.is_alive()):
+			self.endRun()
+
+	# Distribution parameters are asked for before the run starts, so the
+	# simulation thread never opens a window. Returns 1 if cancelled.
+	def askDistParams(self, procDist):
+		if procDist == 'Bounded Pareto':
+			popup = BoundedParetoDist(self)
+			self.wait_window(popup.top)
+			if not hasattr(popup, 'paramArray'):
+				return 1
+			self.BPArray = [float(value) for value in popup.paramArray]
+			self.writeToConsole("Alpha = %s \nLower Bound = %s \nUpper Bound = %s" %(self.BPArray[0], self.BPArray[1], self.BPArray[2]))
+			self.writeToConsole("----------------------------------------------------------------------\n\n")
+		elif procDist == 'Custom':
+			popup = CustomDist(self)
+			self.wait_window(popup.top)
+			if not hasattr(popup, 'stringEquation'):
+				return 1
+			self.customEquation = popup.stringEquation
+		return 0
+
+	def endRun(self):
+		thread = self.simThread
+		self.simThread = None
+		if thread.error != None:
+			self.writeToConsole(thread.errorText)
+			self.updateStatusBar("Simulation failed.")
+		else:
+			self.runResults = thread.result
+			self.finishSubmit()
 
 	def saveData(self, event):
 		# Get filename
@@ -130,6 +196,7 @@ class GUI(Tk):
 		myFile.close()
 
 	def clearConsole(self, event):
+		self.feed.clear()
 		self.console.config(state=NORMAL)       # make console editable
 		self.console.delete('1.0', END)
 		self.console.config(state=DISABLED)     # disable (non-editable) console
@@ -152,6 +219,8 @@ class GUI(Tk):
 		self.writeToConsole("Simulation Length = %.4f"%simLength)
 
 	def saveParams(self, load, arrRate, arrDist, procRate, procDist, percErrorMin, percErrorMax, numClasses, simLength, alpha, lower, upper):
+		if pandas == None:
+			return
 		##params = pandas.DataFrame(columns=('seed', 'numServers', 'load', 'arrRate', 'arrDist', 'procRate', 'procDist', 'alpha', 'lower', 'upper', 'percErrorMin', 'percErrorMax', 'simLength'))
 		print (SEED)
 		params = pandas.DataFrame({	'seed' : [SEED],
@@ -167,10 +236,14 @@ class GUI(Tk):
 									'percErrorMax' : [percErrorMax],
 									'numClasses' : [numClasses],
 									'simLength' : [simLength],
-									'avgNumJobs' : [MachineClass.AvgNumJobs]
+									'avgNumJobs' : [self.MC.AvgNumJobs]
 									})
 
-		params.to_sql(name='parameters', con=conn, if_exists='append')
+		conn = sqlite3.connect(DATABASE)
+		try:
+			params.to_sql(name='parameters', con=conn, if_exists='append')
+		finally:
+			conn.close()
 		print (params)
 
 	# def plotNumJobsInSys(self, numClasses):
@@ -194,15 +267,18 @@ class GUI(Tk):
 	# 	classes = [format(i,'02d') for i in classRange]
 
 	# 	# remove placeholder element
-	# 	MachineClass.AvgNumJobsArray.pop(0)
+	# 	self.MC.AvgNumJobsArray.pop(0)
 
-	# 	dictionary = {'number of jobs': MachineClass.AvgNumJobsArray, 'classes': classes}
+	# 	dictionary = {'number of jobs': self.MC.AvgNumJobsArray, 'classes': classes}
 	# 	df = pandas.DataFrame(data=dictionary)
 
 	# 	bar = Bar(df, 'classes', values='number of jobs', title="Average Number of Jobs Per Class")
 	# 	show(bar)
 	def plotNumJobsInSys(self):
+		if py == None:
+			return
 		py.sign_in('mailacrs','wowbsbc0qo')
+		NumJobsTime, (NumJobs, AvgNumJobs) = self.MC.trace.arrays()
 		trace0 = Scatter(x=NumJobsTime, y=NumJobs)
 		data = [trace0]
 		layout = go.Layout(
@@ -228,7 +304,10 @@ class GUI(Tk):
 		unique_url = py.plot(fig, filename = 'ClassBased_NumJobs')
 
 	def plotAvgNumJobsInSys(self, numClasses):
+		if py == None:
+			return
 		py.sign_in('mailacrs','wowbsbc0qo')
+		NumJobsTime, (NumJobs, AvgNumJobs) = self.MC.trace.arrays()
 		trace0 = Scatter(x=NumJobsTime, y=AvgNumJobs)
 		data = [trace0]
 		layout = go.Layout(
@@ -255,7 +334,7 @@ class GUI(Tk):
 
 		#-----------------------------------------------------------------------------#
 		# Average jobs/class
-		trace1 = go.Bar(y= MachineClass.AvgNumJobsArray)
+		trace1 = go.Bar(y= self.MC.AvgNumJobsArray)
 		
 		data1 = [trace1]
 		layout1 = go.Layout(
@@ -288,12 +367,21 @@ class GUI(Tk):
 		return var/len(List)
 
 	def stopSimulation(self, event):
-		MachineClass.StopSim = True
+		if self.MC != None:
+			self.MC.stopSimulation()
 				
 	def submit(self, event):
+		if self.simThread != None:
+			return		# one run at a time, STOP SIMULATION ends it
+		I = Input(self)
+		if self.askDistParams(I.distList[1]) != 0:
+			self.updateStatusBar("Simulation cancelled.")
+			return
 		self.updateStatusBar("Simulating...")
 		self.clearSavedArrivals()
-		I = Input(self)     
+		self.runInput = I
+		self.profile = self.frameIn.profileInput.get()
+		self.logLevel = self.frameIn.logLevelInput.get()
 
 		self.printParams(I.valuesList[0],					#load
 						 'Exponential',						#arrival
@@ -302,18 +390,28 @@ class GUI(Tk):
 						 I.valuesList[4],					#error max
 						 I.valuesList[5], 					#num Classes
 						 I.valuesList[6])					#sim time
-		main.timesClicked = 0
-		
-		# Start process
-		MC = MachineClass(self)
-		MC.run(	I.valuesList[0],				#load
+
+		# Start process on a worker thread; pollConsole calls finishSubmit
+		# back on the Tk thread once it ends
+		self.MC = MachineClass(self)
+		self.simThread = SimulationThread(self.MC.run,	I.valuesList[0],				#load
 				'Exponential',					#arrival
 				I.valuesList[2], I.distList[1],	# proc
 				I.valuesList[3],				# error min
 				I.valuesList[4],				# error max
 				I.valuesList[5],				# num class
 				I.valuesList[6])				# sim time
+		self.simThread.start()
+
+	# Time spent in each phase, when the run was profiled
+	def printProfile(self):
+		profile = self.runResults.get('profile')
+		if (profile != None):
+			self.writeToConsole(formatProfile(profile))
 
+	# Results, database and plots of the finished run
+	def finishSubmit(self):
+		I = self.runInput
 		self.saveParams(I.valuesList[0],		#load
 					'?', 				# arrival rate
 					'Exponential',					# arrival dist
@@ -322,10 +420,11 @@ class GUI(Tk):
 					I.valuesList[4],				# error max
 					I.valuesList[5], 				# num classes
 					I.valuesList[6],				# sim time
-					JobClass.BPArray[0],			# alpha
-					JobClass.BPArray[1],			# lower
-					JobClass.BPArray[2])			# upper		
+					self.MC.boundedPareto.alpha,	# alpha
+					self.MC.boundedPareto.L,	# lower
+					self.MC.boundedPareto.U)	# upper		
 
+		self.printProfile()
 		self.plotNumJobsInSys()
 		self.plotAvgNumJobsInSys(I.valuesList[5])
 		#self.saveData(event)
@@ -352,6 +451,8 @@ class Input(LabelFrame):
 		self.simLengthInput = DoubleVar()
 		self.errorMessage = StringVar()
 		self.comboboxVal = StringVar()
+		self.profileInput = BooleanVar()
+		self.logLevelInput = StringVar()
 
 		self.loadInput.set(0.70)       		 	   	##################################CHANGE LATER
 		#self.arrivalRateInput.set(1.0)         	 ##################################CHANGE LATER
@@ -413,9 +514,17 @@ class Input(LabelFrame):
 		self.comboboxVal.trace("w", self.selectionChange) # refresh on change
 		self.refreshComboboxes()		
 
-		# Simulate Button
-		self.simulateButton = Button(self, text = "SIMULATE", command = self.onButtonClick)
-		self.simulateButton.grid(row = 7, columnspan = 6)
+		# Simulate Button and run options
+		self.runFrame = Frame(self)
+		self.runFrame.grid(row = 7, columnspan = 6)
+		self.simulateButton = Button(self.runFrame, text = "SIMULATE", command = self.onButtonClick)
+		self.simulateButton.pack(side = LEFT)
+		self.profileCheck = Checkbutton(self.runFrame, text = "Profile phases", variable = self.profileInput)
+		self.profileCheck.pack(side = LEFT, padx = 5)
+		Label(self.runFrame, text = "Console log").pack(side = LEFT)
+		self.logLevelBox = ttk.Combobox(self.runFrame, textvariable = self.logLevelInput, values = LOG_LEVELS, state = 'readonly', width = 6)
+		self.logLevelBox.set('debug')
+		self.logLevelBox.pack(side = LEFT)
 
 	def entryBoxChange(self, name, index, mode):
 		self.refreshLoad()
@@ -681,7 +790,7 @@ class BoundedParetoDist(object):
 		self.a = float(self.e1.get())
 		self.l = float(self.e2.get())
 		self.u = float(self.e3.get())
-		if (self.a <= 0) or (self.u < self.l) or (self.l <= 0):
+		if (self.a <= 0) or (self.u <= self.l) or (self.l <= 0):
 			print ("ERROR: Bounded pareto paramater error")
 			self.errorMessage.set("Bounded pareto paramater error")
 			return 1
@@ -691,523 +800,22 @@ class BoundedParetoDist(object):
 			return 0
 
 		
-#----------------------------------------------------------------------#
-# Class: Node
-#
-# This class is used to define the linked list nodes.
-#
-#----------------------------------------------------------------------#
-class Node():
-	def __init__(self, job, nextNode = None):
-		self.job = job
-		self.nextNode = nextNode
-
-#----------------------------------------------------------------------#
-# Class: LinkedList
-#
-# This class is used to make the linked list data structure used to
-# store jobs.
-#
-#----------------------------------------------------------------------#
-class LinkedList(object):
-	Size = 0
-	NumJobArrayByClass = []
-	Count = 0
-
-	def __init__(self, head = None):
-		self.head = head
-		LinkedList.NumJobArrayByClass[:] = []
-		LinkedList.Count = 0
-		LinkedList.Size = 0
-
-	# Insert job into queue (sorted by class, then name)
-	def insertByClass(self, job):
-		current = self.head		# node iterator, starts at head
-		previous = None
-		if (current == None):	# if queue is empty, set current job as head
-			self.head = Node(job, None)
-		else:
-			while (current != None) and (job.priorityClass >= current.job.priorityClass) and (job.name > current.job.name):
-				previous = current 				# prev = node[i]
-				current = current.nextNode 		# current = node[i+1]
-			
-			# Insert new node after previous before current
-			if (previous == None):
-				self.head = Node(job, current)
-			else:
-				previous.nextNode = Node(job, current)
-
-		LinkedList.Size += 1
-
-	def insertByERPT(self, job, numClasses):
-		current = self.head		# node iterator, starts at head
-		previous = None
-		if (current == None):	# if queue is empty, set current job as head
-			self.head = Node(job, None)
-		else:
-			while (current != None) and (job.priorityClass >= current.job.priorityClass) and (job.ERPT > current.job.ERPT):
-				previous = current 				# prev = node[i]
-				current = current.nextNode 		# current = node[i+1]
-			
-			# Insert new node after previous before current
-			if (previous == None):
-				self.head = Node(job, current)
-			else:
-				previous.nextNode = Node(job, current)
-
-		LinkedList.Size += 1	
-
-	def insertByLCFS(self, job, numClasses):
-		current = self.head		# node iterator, starts at head
-		previous = None
-		if (current == None):	# if queue is empty, set current job as head
-			self.head = Node(job, None)
-		else:
-			while (current != None) and (current.job.priorityClass != numClasses):			# insert at front of last class
-				previous = current 				# prev = node[i]
-				current = current.nextNode 		# current = node[i+1]
-			
-			# Insert new node after previous (before current)
-			if (previous == None):
-				self.head = Node(job, current)
-			else:
-				previous.nextNode = Node(job, current)
-
-		LinkedList.Size += 1		
-
-	# Remove first item in queue
-	def removeHead(self):
-		if (LinkedList.Size > 0):
-			self.head = self.head.nextNode		# move head forward one node
-			LinkedList.Size -= 1
-		else:
-			print ("ERROR: The linked list is already empty!")
-
-	def clear(self):
-		LinkedList.Size = 0
-		self.head = None
-
-	def printList(self):
-		current = self.head
-		print ("---------------------")
-		print ("\nJOBS IN QUEUE:")
-		while (current != None):
-			print ("%s, class %s, ERPT = %.4f"%(current.job.name, current.job.priorityClass, current.job.ERPT))
-			current = current.nextNode
-
-
-	def countClassesQueued(self, numClasses):
-		if(LinkedList.Count == 0):
-			LinkedList.NumJobArrayByClass = [0] * (numClasses + 1)	# create array that holds number of jobs in each classes
-
-		# Iterate through number of classes and count number of jobs per class
-		for j in range(1, numClasses + 1):
-			current = self.head
-			while (current != None):
-				if current.job.priorityClass == j:
-					LinkedList.NumJobArrayByClass[j] += 1
-				elif current.job.priorityClass > numClasses:
-					LinkedList.NumJobArrayByClass[numClasses] += 1
-				current = current.nextNode
-		return LinkedList.NumJobArrayByClass
-
-
-#----------------------------------------------------------------------#
-# Class: JobClass
-#
-# This class is used to define jobs.
-#
-# Attributes: arrival time, processing time, remaining processing 
-# time, estimated remaining processing time, percent error
-#----------------------------------------------------------------------#
-class JobClass(object):
-	BPArray = []
-	
-	def __init__(self, master):
-		self.master = master
-		self.arrivalTime = 0
-		self.procTime = 0
-		self.RPT = 0		# Real Remaining Processing Time
-		self.ERPT = 0		# Estimated Remaining Processing Time
-		self.priorityClass = 100
-		self.percentError = 0
-		self.processRate = 0
-		self.arrivalRate = 0
-
-	def setArrProcRates(self, load, procRate, procDist):
-		if procDist == 'Bounded Pareto':
-			alpha = JobClass.BPArray[0]
-			L = JobClass.BPArray[1]
-			U = JobClass.BPArray[2]
-			if alpha > 1 and L > 0:
-				procMean = (L**alpha/(1 - (L/U)**alpha))*(alpha/(alpha - 1))*((1/(L**(alpha - 1)))-(1/(U**(alpha - 1))))
-				self.processRate = 1/float(procMean)
-		else:
-			self.processRate = procRate
-		self.arrivalRate = float(load) * self.processRate
-
-	# Dictionary of service distributions
-	def setServiceDist(self, procRate, procDist):
-		ServiceDistributions =  {
-			'Poisson': random.expovariate(1.0/procRate),
-			'Exponential': random.expovariate(procRate),
-			'Uniform': random.uniform(0.0, procRate),
-			'Bounded Pareto': self.setBoundedPareto,			
-			'Custom': self.setCustomDist
-		}
-		if(procDist == 'Custom'):
-			return ServiceDistributions[procDist](procRate)
-		elif(procDist == 'Bounded Pareto'):
-			return ServiceDistributions[procDist]()
-		else:
-			return ServiceDistributions[procDist]
-
-	def setCustomDist(self, procRate):
-		if main.timesClicked == 0:
-			main.timesClicked += 1
-			self.popup=CustomDist(self.master)
-			self.master.wait_window(self.popup.top)
-			main.customEquation = self.popup.stringEquation
-		return eval(main.customEquation)
-
-	def setBoundedPareto(self):
-		# Get and set parameters (in job class array)
-		if main.timesClicked == 0:
-			main.timesClicked += 1
-			self.popup = BoundedParetoDist(self.master)
-			self.master.wait_window(self.popup.top)		
-			self.alpha = float(self.popup.paramArray[0])	# Shape, power of tail, alpha = 2 is approx Expon., alpha = 1 gives higher variance
-			self.L = float(self.popup.paramArray[1])		# Smallest job size
-			self.U = float(self.popup.paramArray[2])		# Largest job size
-			JobClass.BPArray = [self.alpha, self.L, self.U]
-
-			GUI.writeToConsole(self.master, "Alpha = %s \nLower Bound = %s \nUpper Bound = %s" %(self.alpha, self.L, self.U))
-			GUI.writeToConsole(self.master, "----------------------------------------------------------------------\n\n")	
-
-		x = random.uniform(0.0, 1.0)
-		# reassigning 
-		alpha = JobClass.BPArray[0]
-		L = JobClass.BPArray[1]
-		U = JobClass.BPArray[2]
-
-		#GUI.writeToConsole(self.master, "Alpha = %s \nLower Bound = %s \nUpper Bound = %s" %(alpha, L, U))
-
-		paretoNumerator = float(-(x*(U**alpha) - x*(L**alpha) - (U**alpha)))
-		paretoDenominator = float((U**alpha) * (L**alpha))
-		main.customEquation = (paretoNumerator/paretoDenominator)**(-1/alpha)
-		
-		return main.customEquation
-
-	# Generates a percent error for processing time
-	def generateError(self, percErrorMin, percErrorMax):
-		self.percentError = random.uniform(percErrorMin, percErrorMax)
-		return self.percentError
-
-	# Sets all processing times for job
-	def setJobAttributes(self, load, procRate, procDist, percErrorMin, percErrorMax, jobArrival):
-		if(procDist == 'Bounded Pareto'):
-			self.procTime = self.setServiceDist(procRate, procDist) 		#use updated proc rate
-			self.setArrProcRates(load, procRate, procDist)
-		else:
-			self.setArrProcRates(load, procRate, procDist)
-			self.procTime = self.setServiceDist(procRate, procDist) 		#use updated proc rate
-		self.estimatedProcTime = (1 + (self.generateError(percErrorMin, percErrorMax)/100.0))*self.procTime
-		self.RPT = self.procTime
-		self.ERPT = self.estimatedProcTime
-		self.arrivalTime = jobArrival
-
-
 #----------------------------------------------------------------------#
 # Class: MachineClass
 #
-# This class is used to generate Jobs at random and process them.
+# This class is used to generate Jobs at random and process them. It is
+# SimEngine's class based machine, run with the options of this
+# window.
 #
 # Entities: jobs, server
 # Events: job arrives, job completes
 # Activities: processing job, waiting for new job
 #
 #----------------------------------------------------------------------#
-class MachineClass(object):
-	Queue = LinkedList()
-	PreviousJobs = []
-	LastClassPrevJobs = []
-	JobOrderOut = []
-	CurrentTime = 0.0
-	NextArrival = 0.0
-	ServiceStartTime = 0
-	ServiceFinishTime = 0
-	ServerBusy = False
-	JobInService = None
-	StopSim = False	
-
-	PrevTime = 0
-	PrevTimeA = 0
-	PrevNumJobs = 0
-	AvgNumJobs = 0
-	PrevNumJobsArray = []
-	AvgNumJobsArray = []
-	counter = 0
-
-
+class MachineClass(ClassBasedMachine):
 	def __init__(self, master):
 		self.master = master
-		MachineClass.Queue.clear()
-		MachineClass.PreviousJobs[:] = []
-		MachineClass.LastClassPrevJobs[:] = []
-		MachineClass.CurrentTime = 0.0
-		MachineClass.NextArrival = 0.0
-		MachineClass.ServiceStartTime = 0
-		MachineClass.ServiceFinishTime = 0
-		MachineClass.ServerBusy = False
-		MachineClass.JobInService = None
-		MachineClass.StopSim = False
-
-
-		MachineClass.PrevTime = 0
-		MachineClass.PrevTimeA = 0
-		MachineClass.PrevNumJobs = 0
-		MachineClass.AvgNumJobs = 0		
-		MachineClass.PrevNumJobsArray[:] = []
-		MachineClass.AvgNumJobsArray[:] = []
-		MachineClass.counter = 0
-
-		NumJobs[:] = []
-		AvgNumJobs[:] = []
-		NumJobsTime[:] = []
-		MachineClass.JobOrderOut[:] = []
-	
-		self.ctr = 0
-
-	# Dictionary of arrival distributions
-	def setArrivalDist(self, arrRate, arrDist):
-		ArrivalDistributions = {
-			'Poisson': random.expovariate(1.0/arrRate),
-			'Exponential': random.expovariate(arrRate)
-			#'Normal': Rnd.normalvariate(self.inputInstance.valuesList[0])
-			#'Custom':
-		}
-		return ArrivalDistributions[arrDist]
-	
-	def getProcessingJob(self):
-		currentJob = MachineClass.Queue.head.job
-		return currentJob
-
-	#update data
-	def updateJob(self):
-		currentJob = self.getProcessingJob()
-		serviceTime = MachineClass.CurrentTime - MachineClass.ServiceStartTime
-		currentJob.RPT -= serviceTime
-		currentJob.ERPT -= serviceTime
-
-	#def saveArrivals(self, job):
-	#	text = "%s,       %.4f,      %.4f,      %.4f,      %s"%(job.name, job.arrivalTime, job.RPT, job.ERPT, job.priorityClass) + "\n"
-	#	
-	#	with open("Arrivals.txt", "a") as myFile:
-	#		myFile.write(text)
-	#	myFile.close()
-
-	# Give arriving job a class and add it to the queue
-	def assignClass(self, numClasses, job, prevJobs, counterStart, counter):
-		# Remove oldest job from previous jobs list if there are too many
-		while len(prevJobs) > (numClasses - 1):
-			prevJobs.pop(0)
-
-		# Sort previous current job with previous jobs
-		self.SortedPrevJobs = []
-		self.SortedPrevJobs = list(prevJobs) 	# copy of prev jobs
-		self.SortedPrevJobs.append(job)							# append current job (not a copy)
-		self.SortedPrevJobs.sort(key=lambda JobClass: JobClass.ERPT)
-
-		iterator = counter
-		for j in self.SortedPrevJobs:
-			if j.name == job.name:
-				job.priorityClass = counterStart + counter
-			counter += iterator
-
-		# If job is in the last class, sort by ERPT
-		if (job.priorityClass == numClasses):
-			#MachineClass.Queue.insertByERPT(job, numClasses);
-			MachineClass.Queue.insertByLCFS(job, numClasses);
-
-		else:
-			# Add current job with new class to queue
-			MachineClass.Queue.insertByClass(job)			# add job to queue
-		
-		# Regardless of class, append job to the general prev jobs list
-		MachineClass.PreviousJobs.append(job)					# add job to previous jobs queue
-
-		# Print queue
-		#MachineClass.Queue.printList()
-		
-
-
-	def calcNumJobs(self, jobID, load):
-		self.currentNumJobs = MachineClass.Queue.Size #NOTE: This includes job in service
-		self.t = MachineClass.CurrentTime
-		self.delta_t = self.t - MachineClass.PrevTime 
-
-		# If one job in system
-		if(jobID == 0):
-			MachineClass.AvgNumJobs = 1 # First event is always create new job
-		# UPDATE 
-		else:
-			MachineClass.AvgNumJobs = (MachineClass.PrevTime/(self.t))*float(MachineClass.AvgNumJobs) + float(MachineClass.PrevNumJobs)*(float(self.delta_t)/self.t)
-			
-		# PrevTime becomes "old" t
-		MachineClass.PrevTime = self.t 
-		# PrevNum jobs becomes current num jobs
-		MachineClass.PrevNumJobs = self.currentNumJobs
-
-		NumJobs.append(self.currentNumJobs)				# y axis of plot
-		AvgNumJobs.append(MachineClass.AvgNumJobs)		# y axis of plot
-		NumJobsTime.append(MachineClass.CurrentTime)	# x axis of plot
-		self.saveNumJobs(load, MachineClass.CurrentTime, self.currentNumJobs)
-		self.saveAvgNumJobs(load, MachineClass.CurrentTime, MachineClass.AvgNumJobs)
-
-	def calcNumJobsPerClass(self, numClasses):
-		numJobsArray = list(MachineClass.Queue.countClassesQueued(numClasses))
-
-		self.t = MachineClass.CurrentTime 
-		self.delta_t = self.t - MachineClass.PrevTimeA
-
-		for i in range(0, numClasses + 1):
-			# If one job in system
-			if(MachineClass.counter == 0):
-				MachineClass.PrevNumJobsArray = [0] * (numClasses + 1) 		# creates array of size (numClasses + 1) filled with 0s
-				MachineClass.AvgNumJobsArray = list(numJobsArray)			# First event is always create new job
-				MachineClass.counter = 1
-			# UPDATE 
-			else:
-				MachineClass.AvgNumJobsArray[i] = (float(MachineClass.PrevTimeA)/self.t)*float(MachineClass.AvgNumJobsArray[i]) + float(MachineClass.PrevNumJobsArray[i])*(float(self.delta_t)/self.t)
-									
-		# PrevTime becomes "old" t (set in regular caclulation)
-		MachineClass.PrevTimeA = self.t 
-		# PrevNum jobs becomes current num jobs
-		MachineClass.PrevNumJobsArray = list(numJobsArray)
-
-	def saveNumJobs(self, load, numJobs, time):
-		text = "%f,%f"%(numJobs, time) + "\n"
-		scaledLoad = int(load * 100)
-		path = "./SINGLE_SERVER_RESULTS/Class/Class_Num_load=%s_alpha=%s_servers=1.txt"%(scaledLoad, JobClass.BPArray[0])
-		
-		with open(path, "a") as myFile:
-			myFile.write(text)
-		myFile.close()				
-
-	def saveAvgNumJobs(self, load, avgNumJobs, time):
-		text = "%f,%f"%(avgNumJobs, time) + "\n"
-		scaledLoad = int(load * 100)
-		path = "./SINGLE_SERVER_RESULTS/Class/Class_Avg_load=%s_alpha=%s_servers=1.txt"%(scaledLoad, JobClass.BPArray[0])
-
-		with open(path, "a") as myFile:
-			myFile.write(text)
-		myFile.close()	
-
-	# Job arriving
-	def arrivalEvent(self, load, arrDist, procRate, procDist, numClasses, percErrorMin, percErrorMax):
-		J = JobClass(self.master)
-		J.setJobAttributes(load, procRate, procDist, percErrorMin, percErrorMax, MachineClass.CurrentTime)
-		J.name = "Job%02d"%self.ctr
-		self.ctr += 1
-
-		self.calcNumJobs(self.ctr, load)
-		self.calcNumJobsPerClass(numClasses)
-
-		if(MachineClass.Queue.Size > 0):
-			self.updateJob()	# update data in queue	
-		self.assignClass(numClasses, J, MachineClass.PreviousJobs, 0, 1)			# give job a class, and add to queue
-		#self.saveArrivals(J)					# save to list of arrivals, for testing
-
-		GUI.writeToConsole(self.master, "%.6f | %s arrived, class = %s"%(MachineClass.CurrentTime, J.name, J.priorityClass))
-		self.processJob()						# process first job in queue
-
-		MachineClass.NextArrival = MachineClass.CurrentTime + self.setArrivalDist(J.arrivalRate, arrDist) # generate next arrival
-		
-
-	# Inserts very large job with very small ERPT
-	def insertLargeJob(self, counter, procDist, numClasses):
-		J = JobClass(self.master)
-		J.setJobAttributes(1, 1, procDist, 0, 0, MachineClass.CurrentTime)
-		J.name = "JobXXXXX" + str(counter)
-		J.RPT = 100000
-		J.ERPT = 50000
-		self.assignClass(numClasses, J, MachineClass.PreviousJobs, 0, 1)
-		GUI.writeToConsole(self.master, "%.6f | %s arrived, ERPT = %.5f"%(MachineClass.CurrentTime, J.name, J.ERPT))
-		
-		self.calcNumJobs(self.ctr)
-		#self.saveArrivals(J)					# save to list of arrivals, for testing
-	
-		if(MachineClass.Queue.Size > 0):
-			self.updateJob()	# update data in queue
-		self.processJob()	# process first job in queue
-	
-		# Generate next arrival
-		MachineClass.TimeUntilArrival = self.setArrivalDist(J.arrivalRate, 'Exponential')		
-
-	# Processing first job in queue
-	def processJob(self):
-		MachineClass.ServiceStartTime = MachineClass.CurrentTime
-		MachineClass.JobInService = self.getProcessingJob()
-		MachineClass.ServiceFinishTime = MachineClass.CurrentTime + MachineClass.JobInService.RPT
-		GUI.writeToConsole(self.master, "%.6f | %s processing, class = %s"%(MachineClass.CurrentTime, MachineClass.JobInService.name, MachineClass.JobInService.priorityClass))
-		MachineClass.ServerBusy = True
-
-	# Job completed
-	def completionEvent(self, numClasses, load):
-		MachineClass.JobOrderOut.append(MachineClass.JobInService.name)
-
-		self.calcNumJobs(self.ctr, load)
-		self.calcNumJobsPerClass(numClasses)
-
-		GUI.writeToConsole(self.master, "%.6f | %s COMPLTED"%(MachineClass.CurrentTime, MachineClass.JobInService.name))
-		MachineClass.ServerBusy = False
-		MachineClass.JobInService = None
-		
-		MachineClass.Queue.removeHead()		 # remove job from queue		
-
-
-	def run(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax, numClasses, simLength):
-		counter = 1;
-		while 1:
-			# Generate time of first job arrival
-			if(self.ctr == 0):
-				arrRate = float(load) / procRate
-				MachineClass.NextArrival = MachineClass.CurrentTime + self.setArrivalDist(arrRate, arrDist)
-
-			# If no jobs in system, or time to arrival is less than remaining processing time of job currently processing
-			#if (MachineClass.CurrentTime >= 5000 and has_run == False):
-			#	self.insertLargeJob(procDist, numClasses)
-			#	has_run = True
-
-			#Inject large jobs
-			#if(MachineClass.CurrentTime >= 2000000.0 and counter == 1):
-			#	self.insertLargeJob(counter, procDist, numClasses);
-			#	counter += 1;
-			#	print ("FIRST LARGE JOB INJECTED");
-			#elif(MachineClass.CurrentTime >= 2000500.0 and counter == 2):
-			#	self.insertLargeJob(counter, procDist, numClasses);
-			#	counter += 1;
-			#	print ("SECOND LARGE JOB INJECTED");				
-
-			if (MachineClass.ServerBusy == False) or ((MachineClass.ServerBusy == True) and (MachineClass.NextArrival < MachineClass.ServiceFinishTime)):
-				#next event is arrival
-				MachineClass.CurrentTime = MachineClass.NextArrival
-
-				# stop server from processing current job
-				MachineClass.ServerBusy == False
-				self.arrivalEvent(load, arrDist, procRate, procDist, numClasses, percErrorMin, percErrorMax)
-			else:
-				#next event is job finishing
-				MachineClass.CurrentTime = MachineClass.ServiceFinishTime
-				self.completionEvent(numClasses, load)
-
-				if(MachineClass.Queue.Size > 0):
-					self.processJob()
-
-			# If current time is greater than the simulation length, end program
-			if (MachineClass.CurrentTime > simLength) or (MachineClass.StopSim == True):
-				break
-
+		ClassBasedMachine.__init__(self, **windowOptions(master))
 
 
 #----------------------------------------------------------------------#
@@ -1215,10 +823,6 @@ def main():
 	window = GUI(None)                           			   # instantiate the class with no parent (None)
 	window.title('Single Server Approximate SRPT with Errors')  # title the window
 
-	# Global variables used in JobClass
-	main.timesClicked = 0       
-	main.customEquation = ""
-
 	#window.geometry("500x600")                     # set window size
 	window.mainloop()                               # loop indefinitely, wait for events
 
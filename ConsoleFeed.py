@@ -0,0 +1,112 @@
+#----------------------------------------------------------------------#
+# ConsoleFeed.py
+#
+# Console output for the GUIs while a simulation runs on a worker
+# thread. The simulation writes lines into a bounded ConsoleFeed, which
+# keeps only the newest maxLines when the GUI falls behind, and the Tk
+# thread drains it in batches on an after() timer and appends them to
+# the console Text widget, which is itself capped at a number of lines.
+# Tk widgets are only ever touched from the Tk thread. windowOptions
+# gives the machine options every GUI window runs with.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from collections import deque
+import threading
+import traceback
+
+from SimParams import OutputOptions, Scenario
+
+CONSOLE_POLL_MS = 50			# how often the Tk thread drains the feed
+CONSOLE_BATCH_LINES = 2000		# lines shown per drain at most
+CONSOLE_MAX_LINES = 5000		# lines kept in the console widget
+CONSOLE_QUEUE_LINES = 20000		# lines queued before the oldest are dropped
+
+
+#----------------------------------------------------------------------#
+# Class: ConsoleFeed
+#
+# Thread safe ring buffer of console lines. write() never blocks the
+# simulation: when maxLines are already waiting the oldest is dropped
+# and counted, and drain() reports how many were skipped.
+#
+#----------------------------------------------------------------------#
+class ConsoleFeed(object):
+	def __init__(self, maxLines = CONSOLE_QUEUE_LINES):
+		if maxLines < 1:
+			raise ValueError("Console feed must hold at least 1 line!")
+		self.lines = deque(maxlen = maxLines)
+		self.dropped = 0
+		self.lock = threading.Lock()
+
+	def write(self, text):
+		with self.lock:
+			if len(self.lines) == self.lines.maxlen:
+				self.dropped += 1
+			self.lines.append(text)
+
+	# Returns (up to maxLines waiting lines, number dropped since the last drain)
+	def drain(self, maxLines = CONSOLE_BATCH_LINES):
+		with self.lock:
+			count = min(maxLines, len(self.lines))
+			lines = [self.lines.popleft() for i in range(count)]
+			dropped, self.dropped = self.dropped, 0
+		return lines, dropped
+
+	def clear(self):
+		with self.lock:
+			self.lines.clear()
+			self.dropped = 0
+
+
+# Appends lines to a disabled Text widget in one insert, trims it to the
+# last maxLines lines and scrolls to the end
+def showLines(console, lines, maxLines = CONSOLE_MAX_LINES):
+	console.config(state='normal')			# make console editable
+	console.insert('end', ''.join('%s\n'%line for line in lines))
+	excess = int(console.index('end-1c').split('.')[0]) - 1 - maxLines		# text ends with a newline
+	if excess > 0:
+		console.delete('1.0', '%d.0'%(excess + 1))
+	console.yview('end')					# auto-scroll
+	console.config(state='disabled')		# disable (non-editable) console
+
+
+#----------------------------------------------------------------------#
+# Class: SimulationThread
+#
+# Daemon thread that runs one simulation. The value the run returns is
+# kept in result, and any exception in error (with its formatted
+# traceback), for the Tk thread to report once is_alive() turns false.
+#
+#----------------------------------------------------------------------#
+class SimulationThread(threading.Thread):
+	def __init__(self, target, *args):
+		threading.Thread.__init__(self, name = "simulation")
+		self.daemon = True					# closing the window ends the run
+		self.runTarget = target
+		self.runArgs = args
+		self.result = None
+		self.error = None
+		self.errorText = ""
+
+	def run(self):
+		try:
+			self.result = self.runTarget(*self.runArgs)
+		except Exception as error:
+			self.error = error
+			self.errorText = traceback.format_exc()
+
+
+# Keyword arguments (scenario, output, rng) of the SimEngine machine a
+# GUI window runs. Its draws continue the window's random stream,
+# results and traces go where the scripts have always put them, and the
+# event log and progress reports go to the console and status bar.
+def windowOptions(window):
+	sizes = dict(zip(('alpha', 'lower', 'upper'), window.BPArray))	# empty until Bounded Pareto is picked
+	scenario = Scenario(customEquation = window.customEquation, variates = 'random', **sizes)
+	output = OutputOptions(saveResults = True, resultsDir = "./SINGLE_SERVER_RESULTS",
+						tracePolicy = 'minmax', traceInterval = 1.0, traceMaxPoints = 20000,
+						console = window.writeToConsole, logLevel = window.logLevel,
+						progress = window.setProgress, profile = window.profile)
+	return {'scenario' : scenario, 'output' : output, 'rng' : window.rng}
@@ -0,0 +1,130 @@
+#----------------------------------------------------------------------#
+# EventCalendar.py
+#
+# Future event list for the event loops. Events are kept in a binary
+# heap ordered by time, so scheduling, rescheduling and taking the next
+# event are all O(log E) however many kinds of event there are. Rare
+# events (a large job injected at a set time, the end of the run) sit
+# in the calendar until they are due instead of being tested for on
+# every pass of the loop.
+#
+# Events at the same time come out in the order of their kinds below
+# (a completion before an arrival, as the old loops did on ties), then
+# in the order they were scheduled.
+#
+# The machines keep the next arrival themselves rather than in the
+# calendar: it is due on almost every pass, and SRPTE moves it at every
+# completion. before() compares it with the calendar's next event, so
+# the main path costs no heap operation for it.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import heapq
+import itertools
+
+# Event kinds, in the order events at the same time are taken
+COMPLETION = 0
+ARRIVAL = 1
+INJECTION = 2
+STOP = 3
+EVENT_NAMES = ('completion', 'arrival', 'injection', 'stop')
+
+COMPACT_MIN = 64		# cancelled events kept before the heap is worth rebuilding
+
+
+#----------------------------------------------------------------------#
+# Class: EventCalendar
+#
+# schedule() returns the event, a list [time, kind, sequence, data,
+# pending], which can be passed to cancel() or reschedule() until it
+# has been taken by pop(). Cancelled events stay in the heap, marked,
+# and are skipped when they reach the top; the heap is rebuilt once
+# they make up more than half of it.
+#
+#----------------------------------------------------------------------#
+class EventCalendar(object):
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		self.heap = []
+		self.sequence = itertools.count()
+		self.cancelled = 0
+
+	def __len__(self):
+		return len(self.heap) - self.cancelled
+
+	def schedule(self, time, kind, data = None):
+		event = [time, kind, next(self.sequence), data, True]
+		heapq.heappush(self.heap, event)
+		return event
+
+	def cancel(self, event):
+		if event is not None and event[4]:
+			event[4] = False
+			if self.heap[0] is event:
+				heapq.heappop(self.heap)
+			else:
+				self.markCancelled()
+
+	def markCancelled(self):
+		self.cancelled += 1
+		if self.cancelled > COMPACT_MIN and 2*self.cancelled > len(self.heap):
+			self.compact()
+
+	# Same as cancel then schedule. The event in service is usually the
+	# next one due, so it is replaced at the top of the heap in one step
+	# instead of being left behind as a cancelled entry.
+	def reschedule(self, event, time, kind, data = None):
+		newEvent = [time, kind, next(self.sequence), data, True]
+		if event is not None and event[4]:
+			event[4] = False
+			if self.heap[0] is event:
+				heapq.heapreplace(self.heap, newEvent)
+				return newEvent
+			self.markCancelled()
+		heapq.heappush(self.heap, newEvent)
+		return newEvent
+
+	# Removes and returns the next pending event, the list
+	# [time, kind, sequence, data, pending]
+	def pop(self):
+		heap = self.heap
+		while heap:
+			event = heapq.heappop(heap)
+			if event[4]:
+				event[4] = False		# taken; cancelling it now does nothing
+				return event
+			self.cancelled -= 1
+		raise IndexError("No events left in the calendar!")
+
+	# Next pending event, left in the calendar, or None if there is none
+	def peek(self):
+		heap = self.heap
+		while heap and not heap[0][4]:
+			heapq.heappop(heap)
+			self.cancelled -= 1
+		return heap[0] if heap else None
+
+	# Time of the next pending event, or None if there is none
+	def peekTime(self):
+		event = self.peek()
+		return None if event is None else event[0]
+
+	# True if an event of this kind at this time, kept outside the
+	# calendar, comes before every pending event
+	def before(self, time, kind):
+		heap = self.heap
+		while heap and not heap[0][4]:
+			heapq.heappop(heap)
+			self.cancelled -= 1
+		if not heap:
+			return True
+		head = heap[0]
+		return time < head[0] or (time == head[0] and kind < head[1])
+
+	def compact(self):
+		self.heap = [event for event in self.heap if event[4]]
+		heapq.heapify(self.heap)
+		self.cancelled = 0
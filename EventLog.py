@@ -0,0 +1,126 @@
+#----------------------------------------------------------------------#
+# EventLog.py
+#
+# Structured log of the simulation events. Machines hand the log typed
+# records (arrival, large job injection, class assignment, start of
+# service, preemption and completion) instead of formatting console text
+# themselves, and sinks
+# decide what to do with them: TextSink formats them as the old console
+# lines for the Tk console or stdout, FileSink writes them as CSV rows.
+#
+# Each event kind has a level. The level filter is resolved once when a
+# run starts: emitter() returns None for kinds that are off, so the
+# machines only pay an `is not None` test per event, and nothing is
+# formatted unless a sink will use it. Logging is off by default.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from collections import namedtuple
+import os
+
+from JobQueues import jobName
+from ResultsWriter import ResultsWriter
+
+LOG_LEVELS = ('off', 'info', 'debug')
+EVENT_KINDS = ('arrival', 'injection', 'class', 'start', 'preempt', 'completion')
+EVENT_LEVELS = {'arrival' : 'info',
+				'injection' : 'info',
+				'class' : 'debug',
+				'start' : 'debug',
+				'preempt' : 'debug',
+				'completion' : 'info'}
+
+TEXT_FORMATS = {'arrival' : "{time:.6f} | {job} arrived, ERPT = {ERPT:.5f}",
+				'injection' : "{time:.6f} | {job} LARGE JOB INJECTED",
+				'class' : "{time:.6f} | {job} assigned class {priorityClass}",
+				'start' : "{time:.6f} | {job} processing, ERPT = {ERPT:.5f}",
+				'preempt' : "{time:.6f} | {job} preempted, ERPT = {ERPT:.5f}",
+				'completion' : "{time:.6f} | {job} COMPLTED"}
+
+FILE_COLUMNS = "time,event,job,ERPT,class\n"
+
+
+# One logged event. job is the job's name; priorityClass is None for
+# jobs that have not been given a class.
+EventRecord = namedtuple('EventRecord', 'kind time job ERPT priorityClass')
+
+
+def formatRecord(record):
+	return TEXT_FORMATS[record.kind].format(**record._asdict())
+
+
+#----------------------------------------------------------------------#
+# Class: TextSink
+#
+# Sends each record, formatted as a console line, to a callable such
+# as GUI.writeToConsole or print.
+#
+#----------------------------------------------------------------------#
+class TextSink(object):
+	def __init__(self, writeLine):
+		self.writeLine = writeLine
+
+	def write(self, record):
+		self.writeLine(formatRecord(record))
+
+	def close(self):
+		pass
+
+
+#----------------------------------------------------------------------#
+# Class: FileSink
+#
+# Appends each record to a CSV file (time,event,job,ERPT,class) through
+# a buffered ResultsWriter. The header is written when the file is new.
+#
+#----------------------------------------------------------------------#
+class FileSink(object):
+	def __init__(self, path, flushSize = 10000):
+		self.path = path
+		self.writer = ResultsWriter(flushSize)
+
+	def write(self, record):
+		if self.path not in self.writer.buffers and (not os.path.exists(self.path) or os.path.getsize(self.path) == 0):
+			self.writer.write(self.path, FILE_COLUMNS)
+		self.writer.write(self.path, "%.6f,%s,%s,%.6f,%s\n"%(record.time, record.kind, record.job, record.ERPT,
+						'' if record.priorityClass is None else record.priorityClass))
+
+	def close(self):
+		self.writer.close()
+
+
+#----------------------------------------------------------------------#
+# Class: EventLog
+#
+# Routes the records of the event kinds at or below level to the sinks.
+# Machines call emitter(kind) once per run and keep the result, which is
+# None when that kind is not logged or there are no sinks, otherwise a
+# function taking (time, job). Records carry the job's class only when
+# withClass is set, since jobs are not given one by every scheduler.
+#
+#----------------------------------------------------------------------#
+class EventLog(object):
+	def __init__(self, level = 'off', sinks = ()):
+		if level not in LOG_LEVELS:
+			raise ValueError("Unknown log level %r, expected one of %s"%(level, ', '.join(LOG_LEVELS)))
+		self.level = level
+		self.sinks = list(sinks)
+
+	def enabled(self, kind):
+		return bool(self.sinks) and LOG_LEVELS.index(EVENT_LEVELS[kind]) <= LOG_LEVELS.index(self.level)
+
+	def emitter(self, kind, withClass = False):
+		if not self.enabled(kind):
+			return None
+		sinks = self.sinks
+
+		def emit(time, job):
+			record = EventRecord(kind, time, jobName(job), job.ERPT, job.priorityClass if withClass else None)
+			for sink in sinks:
+				sink.write(record)
+		return emit
+
+	def close(self):
+		for sink in self.sinks:
+			sink.close()
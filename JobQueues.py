@@ -0,0 +1,289 @@
+#----------------------------------------------------------------------#
+# JobQueues.py
+#
+# Job records and the job stores used by the simulators in place of
+# the sorted linked lists. Each queue keeps the job in service at the
+# head and exposes the same Size / removeHead interface the machines
+# depend on.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from bisect import bisect_left, bisect_right, insort
+from collections import deque
+import heapq
+
+
+# Jobs are identified by an integer jobID and only get a name when
+# printed. The large jobs injected by the catastrophic GUIs are numbered
+# -1, -2, ... and keep their old JobXXXXX names.
+def jobName(job):
+	if job.jobID < 0:
+		return "JobXXXXX%d"%-job.jobID
+	return "Job%02d"%job.jobID
+
+
+#----------------------------------------------------------------------#
+# Class: JobClass
+#
+# Compact job record shared by the engine and the GUIs. Jobs only hold
+# their own times, with __slots__ instead of a per-instance dict and no
+# reference back to the machine or the GUI; sizes, errors and rates are
+# drawn by the machine's newJob. priorityClass is only set by the class
+# based schedulers.
+#
+# Attributes: job ID, arrival time, processing time, remaining processing
+# time, estimated remaining processing time, class, percent error
+#----------------------------------------------------------------------#
+class JobClass(object):
+	__slots__ = ('jobID', 'arrivalTime', 'procTime', 'RPT', 'ERPT', 'priorityClass', 'percentError')
+
+	def __init__(self, jobID, arrivalTime, procTime, percentError):
+		self.jobID = jobID		# arrival number; see jobName for output
+		self.arrivalTime = arrivalTime
+		self.procTime = procTime
+		self.RPT = procTime		# Real Remaining Processing Time
+		self.ERPT = (1 + (percentError/100.0))*procTime		# Estimated Remaining Processing Time
+		self.priorityClass = 100
+		self.percentError = percentError
+
+
+#----------------------------------------------------------------------#
+# Class: ERPTHeapQueue
+#
+# This class stores jobs in a binary heap keyed on ERPT, giving
+# O(log n) insert and removeHead instead of walking a linked list.
+#
+# The head job is kept outside the heap because the machine decreases
+# its ERPT while it is in service; every job inside the heap keeps the
+# key it was pushed with. Ties are broken newest first, matching the
+# order LinkedList.insert produced.
+#
+#----------------------------------------------------------------------#
+class ERPTHeapQueue(object):
+	def __init__(self):
+		self.headJob = None		# job currently at the front (in service)
+		self.heap = []			# (ERPT, -pushOrder, job) for every other job
+		self.pushCount = 0
+		self.Size = 0
+
+	def push(self, job):
+		self.pushCount += 1
+		heapq.heappush(self.heap, (job.ERPT, -self.pushCount, job))
+
+	# Insert job into queue (sorted by ERPT)
+	def insert(self, job):
+		if (self.headJob == None):
+			self.headJob = job
+		elif (job.ERPT > self.headJob.ERPT):
+			self.push(job)
+		else:
+			# New job preempts the head, which goes back with its updated ERPT
+			self.push(self.headJob)
+			self.headJob = job
+		self.Size += 1
+
+	# Remove first item in queue
+	def removeHead(self):
+		if (self.Size > 0):
+			if self.heap:
+				self.headJob = heapq.heappop(self.heap)[2]
+			else:
+				self.headJob = None
+			self.Size -= 1
+		else:
+			raise IndexError("The job queue is already empty!")
+
+	def clear(self):
+		self.headJob = None
+		self.heap = []
+		self.pushCount = 0
+		self.Size = 0
+
+	def printList(self):
+		if (self.headJob != None):
+			print (jobName(self.headJob), self.headJob.ERPT)
+		for ERPT, order, job in sorted(self.heap):
+			print (jobName(job), ERPT)
+
+
+#----------------------------------------------------------------------#
+# Class: FIFOBucket
+#
+# First come first served bucket of jobs for a single priority class.
+#
+#----------------------------------------------------------------------#
+class FIFOBucket(object):
+	def __init__(self):
+		self.jobs = deque()
+		self.Size = 0
+
+	@property
+	def headJob(self):
+		return self.jobs[0]
+
+	def insert(self, job):
+		self.jobs.append(job)
+		self.Size += 1
+
+	def removeHead(self):
+		self.jobs.popleft()
+		self.Size -= 1
+
+
+#----------------------------------------------------------------------#
+# Class: LCFSBucket
+#
+# Last come first served bucket; new jobs go in front of (and so
+# preempt) every job already in the class.
+#
+#----------------------------------------------------------------------#
+class LCFSBucket(FIFOBucket):
+	def insert(self, job):
+		self.jobs.appendleft(job)
+		self.Size += 1
+
+
+BUCKET_ORDERS = {
+	'FIFO': FIFOBucket,
+	'LCFS': LCFSBucket,
+	'ERPT': ERPTHeapQueue
+}
+
+
+#----------------------------------------------------------------------#
+# Class: ClassBucketQueue
+#
+# This class stores jobs for the class based scheduler as one bucket
+# per priority class plus a bitmap of the non-empty classes. Finding
+# the head is a lowest-set-bit lookup and inserting only touches the
+# job's own bucket, so neither depends on how long the queue gets.
+#
+# Classes 1 to numClasses - 1 are served FIFO and the last class LCFS,
+# the same order insertByClass and insertByLCFS produced. The number of
+# jobs in each class is kept up to date on every insert and removal.
+#
+#----------------------------------------------------------------------#
+class ClassBucketQueue(object):
+	def __init__(self, numClasses = 1, classOrder = 'FIFO', lastClassOrder = 'LCFS'):
+		self.classOrder = classOrder
+		self.lastClassOrder = lastClassOrder
+		self.clear(numClasses)
+
+	# Empty the queue, rebuilding the buckets if numClasses is given
+	def clear(self, numClasses = None):
+		if numClasses != None:
+			self.numClasses = numClasses
+		for order in (self.classOrder, self.lastClassOrder):
+			if order not in BUCKET_ORDERS:
+				raise ValueError("Unknown class order %r, expected one of %s"%(order, ', '.join(BUCKET_ORDERS)))
+
+		# Index 0 is unused so buckets line up with priorityClass
+		self.buckets = [None] + [BUCKET_ORDERS[self.classOrder]() for i in range(1, self.numClasses)] + [BUCKET_ORDERS[self.lastClassOrder]()]
+		self.nonEmpty = 0		# bit c is set while class c has jobs
+		self.NumJobArrayByClass = [0] * (self.numClasses + 1)
+		self.Size = 0
+
+	def headClass(self):
+		return (self.nonEmpty & -self.nonEmpty).bit_length() - 1
+
+	@property
+	def headJob(self):
+		if (self.Size == 0):
+			return None
+		return self.buckets[self.headClass()].headJob
+
+	# Insert job into the bucket for its class
+	def insert(self, job):
+		self.buckets[job.priorityClass].insert(job)
+		self.nonEmpty |= 1 << job.priorityClass
+		self.NumJobArrayByClass[job.priorityClass] += 1
+		self.Size += 1
+
+	# Remove first item in queue
+	def removeHead(self):
+		if (self.Size > 0):
+			priorityClass = self.headClass()
+			bucket = self.buckets[priorityClass]
+			bucket.removeHead()
+			if (bucket.Size == 0):
+				self.nonEmpty &= ~(1 << priorityClass)
+			self.NumJobArrayByClass[priorityClass] -= 1
+			self.Size -= 1
+		else:
+			raise IndexError("The job queue is already empty!")
+
+	# Number of jobs in each class, index 0 unused. This is the live
+	# counter array, copy it before keeping it past the next event.
+	def countClassesQueued(self, numClasses):
+		return self.NumJobArrayByClass
+
+	def printList(self):
+		print ("---------------------")
+		print ("\nJOBS IN QUEUE:")
+		for priorityClass in range(1, self.numClasses + 1):
+			bucket = self.buckets[priorityClass]
+			if isinstance(bucket, ERPTHeapQueue):
+				jobs = ([bucket.headJob] if bucket.headJob != None else []) + [entry[2] for entry in sorted(bucket.heap)]
+			else:
+				jobs = bucket.jobs
+			for job in jobs:
+				print ("%s, class %s, ERPT = %.4f"%(jobName(job), job.priorityClass, job.ERPT))
+
+
+#----------------------------------------------------------------------#
+# Class: ERPTWindow
+#
+# Sliding window over the last `size` arrivals used to assign classes.
+# The window keeps its jobs in arrival order (a deque) and their ERPTs
+# in a sorted list, so the rank of a new ERPT is a binary search and
+# adding or dropping a job is one bisect and one list shift, instead of
+# sorting the whole window on every arrival. The shift is O(k) for a
+# window of k = numClasses - 1 jobs, but it is a single memmove, which
+# for the window sizes used here beats the O(log k) Python level steps
+# of a balanced tree; two heaps would not give the rank at all.
+#
+# A job still in the window can be serviced and have its ERPT lowered;
+# call update(job) after changing it so the sorted keys stay current.
+#
+#----------------------------------------------------------------------#
+class ERPTWindow(object):
+	def __init__(self, size = 0):
+		self.clear(size)
+
+	def clear(self, size = None):
+		if size != None:
+			if size < 0:
+				raise ValueError("Window size can not be negative!")
+			self.size = size
+		self.jobs = deque()		# jobs in arrival order
+		self.keys = {}			# job -> ERPT it is sorted under
+		self.sortedERPT = []
+
+	def __len__(self):
+		return len(self.jobs)
+
+	# Number of jobs in the window with ERPT at or below the given one
+	def rank(self, ERPT):
+		return bisect_right(self.sortedERPT, ERPT)
+
+	def removeKey(self, key):
+		del self.sortedERPT[bisect_left(self.sortedERPT, key)]
+
+	# Add an arriving job, dropping the oldest once the window is full
+	def push(self, job):
+		if self.size == 0:
+			return
+		if len(self.jobs) == self.size:
+			self.removeKey(self.keys.pop(self.jobs.popleft()))
+		self.jobs.append(job)
+		self.keys[job] = job.ERPT
+		insort(self.sortedERPT, job.ERPT)
+
+	# Re-sort a job whose ERPT changed while it was in the window
+	def update(self, job):
+		key = self.keys.get(job)
+		if key != None and key != job.ERPT:
+			self.removeKey(key)
+			self.keys[job] = job.ERPT
+			insort(self.sortedERPT, job.ERPT)
@@ -0,0 +1,382 @@
+#----------------------------------------------------------------------#
+# OutputAnalysis.py
+#
+# Statistics for simulation output: Student t quantiles and confidence
+# intervals for the mean of a set of independent estimates (one per
+# replication), a streaming batch means estimator with MSER-5 warm-up
+# deletion for single long runs, and compensated time average
+# accumulators for the number in system. Only the standard library is
+# needed; NumPy, when installed, is used to read the per-class averages.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import math
+from statistics import NormalDist
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+DEFAULT_CONFIDENCE = 0.95
+
+
+# Continued fraction for the regularized incomplete beta function
+# (modified Lentz's method)
+def betaContinuedFraction(a, b, x, maxIterations = 300, epsilon = 1e-15):
+	tiny = 1e-300
+	c = 1.0
+	d = 1.0 - (a + b)*x/(a + 1.0)
+	if abs(d) < tiny:
+		d = tiny
+	d = 1.0/d
+	h = d
+	for m in range(1, maxIterations + 1):
+		m2 = 2*m
+		aa = m*(b - m)*x/((a + m2 - 1.0)*(a + m2))
+		d = 1.0 + aa*d
+		if abs(d) < tiny:
+			d = tiny
+		c = 1.0 + aa/c
+		if abs(c) < tiny:
+			c = tiny
+		d = 1.0/d
+		h *= d*c
+		aa = -(a + m)*(a + b + m)*x/((a + m2)*(a + m2 + 1.0))
+		d = 1.0 + aa*d
+		if abs(d) < tiny:
+			d = tiny
+		c = 1.0 + aa/c
+		if abs(c) < tiny:
+			c = tiny
+		d = 1.0/d
+		delta = d*c
+		h *= delta
+		if abs(delta - 1.0) < epsilon:
+			break
+	return h
+
+
+# Regularized incomplete beta function I_x(a, b)
+def incompleteBeta(a, b, x):
+	if x <= 0.0:
+		return 0.0
+	if x >= 1.0:
+		return 1.0
+	front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a*math.log(x) + b*math.log(1.0 - x))
+	if x < (a + 1.0)/(a + b + 2.0):
+		return front*betaContinuedFraction(a, b, x)/a
+	return 1.0 - front*betaContinuedFraction(b, a, 1.0 - x)/b
+
+
+# Cumulative distribution function of Student's t with df degrees of freedom
+def tCDF(t, df):
+	tail = 0.5*incompleteBeta(df/2.0, 0.5, df/(df + t*t))
+	return 1.0 - tail if t > 0 else tail
+
+
+#----------------------------------------------------------------------#
+# Function: tQuantile
+#
+# Returns t such that P(T <= t) = p for Student's t with df degrees of
+# freedom, found by bisection on tCDF. df = None (or infinite) gives
+# the standard normal quantile.
+#
+#----------------------------------------------------------------------#
+def tQuantile(p, df = None):
+	if not 0.0 < p < 1.0:
+		raise ValueError("Probability must be between 0 and 1!")
+	if df is None or math.isinf(df):
+		return NormalDist().inv_cdf(p)
+	if df <= 0:
+		raise ValueError("Degrees of freedom must be positive!")
+	if p < 0.5:
+		return -tQuantile(1.0 - p, df)
+
+	low, high = 0.0, 1.0
+	while tCDF(high, df) < p:
+		low, high = high, 2.0*high
+	for i in range(200):
+		middle = 0.5*(low + high)
+		if tCDF(middle, df) < p:
+			low = middle
+		else:
+			high = middle
+		if high - low <= 1e-12*high:
+			break
+	return 0.5*(low + high)
+
+
+#----------------------------------------------------------------------#
+# Function: confidenceInterval
+#
+# Summarises independent, identically distributed estimates (one per
+# replication or batch). Returns a dict with the number of values n,
+# their mean, sample variance and standard deviation, and the t based
+# confidence interval for the mean (halfWidth, low, high). With fewer
+# than two values the variance and interval are undefined (nan).
+#
+#----------------------------------------------------------------------#
+def confidenceInterval(values, confidence = DEFAULT_CONFIDENCE):
+	if not 0.0 < confidence < 1.0:
+		raise ValueError("Confidence level must be between 0 and 1!")
+	values = [float(value) for value in values]
+	n = len(values)
+	if n == 0:
+		raise ValueError("Need at least one value for a confidence interval!")
+
+	mean = math.fsum(values)/n
+	if n < 2:
+		variance = halfWidth = float('nan')
+	else:
+		variance = math.fsum((value - mean)**2 for value in values)/(n - 1)
+		halfWidth = tQuantile(0.5 + confidence/2.0, n - 1)*math.sqrt(variance/n)
+	return {'n' : n,
+			'mean' : mean,
+			'variance' : variance,
+			'stdDev' : math.sqrt(variance),
+			'confidence' : confidence,
+			'halfWidth' : halfWidth,
+			'low' : mean - halfWidth,
+			'high' : mean + halfWidth}
+
+
+#----------------------------------------------------------------------#
+# Function: mserTruncation
+#
+# MSER-m warm-up deletion. The observations are averaged in groups of
+# m and the number of groups d to delete is the one minimising
+#	sum over kept groups of (z_j - mean of kept)^2 / (kept groups)^2
+# with d limited to the first half of the groups. Returns the number of
+# observations to delete (d*m).
+#
+#----------------------------------------------------------------------#
+def mserTruncation(values, m = 5):
+	groups = [math.fsum(values[i:i + m])/m for i in range(0, len(values) - m + 1, m)]
+	if len(groups) < 2:
+		return 0
+
+	# Sums over the kept groups, built from the end so each d is O(1)
+	best, bestD = None, 0
+	total = totalSq = 0.0
+	suffix = []
+	for z in reversed(groups):
+		total += z
+		totalSq += z*z
+		suffix.append((total, totalSq))
+	suffix.reverse()
+	for d in range(len(groups)//2 + 1):
+		kept = len(groups) - d
+		total, totalSq = suffix[d]
+		statistic = max(totalSq - total*total/kept, 0.0)/(kept*kept)
+		if best is None or statistic < best:
+			best, bestD = statistic, d
+	return bestD*m
+
+
+#----------------------------------------------------------------------#
+# Class: BatchMeans
+#
+# Streaming batch means estimate of the steady state time average of a
+# step function such as the number in system. record(time, value) is
+# called at each event with the value held from that time on; the area
+# under the function is collected into batches of batchLength time
+# units. When maxBatches batches have been closed, neighbouring batches
+# are merged and the length doubled, so memory stays bounded however
+# long the run. maxBatches is at least 20*numBatches, so the batches left
+# after a merge are still enough for an estimate.
+#
+# estimate() deletes the warm-up found by MSER-5 on the batches, groups
+# what is left into numBatches equal batches and returns the confidence
+# interval of their mean. With targetHalfWidth (absolute) or
+# targetPrecision (half width / mean) set, the estimate is checked as
+# batches close and `converged` is set once the target is met.
+#
+#----------------------------------------------------------------------#
+class BatchMeans(object):
+	def __init__(self, batchLength = 100.0, maxBatches = 1024, numBatches = 20, confidence = DEFAULT_CONFIDENCE,
+				targetHalfWidth = None, targetPrecision = None, checkEvery = 32):
+		if batchLength <= 0:
+			raise ValueError("Batch length must be positive!")
+		if numBatches < 2:
+			raise ValueError("Need at least 2 batches for a confidence interval!")
+		if maxBatches < 20*numBatches or maxBatches % 2:
+			raise ValueError("Maximum number of batches must be even and at least 20 times numBatches!")
+		self.initialBatchLength = batchLength
+		self.maxBatches = maxBatches
+		self.numBatches = numBatches
+		self.confidence = confidence
+		self.targetHalfWidth = targetHalfWidth
+		self.targetPrecision = targetPrecision
+		self.checkEvery = checkEvery
+		self.clear()
+
+	def clear(self):
+		self.batchLength = self.initialBatchLength
+		self.batches = []			# mean of each closed batch
+		self.batchEnd = self.batchLength
+		self.area = 0.0				# area of the open batch so far
+		self.time = 0.0
+		self.value = 0.0
+		self.closed = 0				# batches closed since the last check
+		self.converged = False
+
+	def record(self, time, value):
+		if time >= self.batchEnd:
+			self.closeBatches(time)
+		self.area += self.value*(time - self.time)
+		self.time = time
+		self.value = value
+
+	def closeBatches(self, time):
+		while time >= self.batchEnd:
+			self.area += self.value*(self.batchEnd - self.time)
+			self.batches.append(self.area/self.batchLength)
+			self.area = 0.0
+			self.time = self.batchEnd
+			self.batchEnd += self.batchLength
+			self.closed += 1
+			if len(self.batches) >= self.maxBatches:
+				self.merge()
+		if self.closed >= self.checkEvery and (self.targetHalfWidth is not None or self.targetPrecision is not None):
+			self.closed = 0
+			self.converged = self.targetMet(self.estimate())
+
+	# Merge neighbouring batches and double the batch length; the open
+	# batch starts on an even boundary so it simply becomes longer
+	def merge(self):
+		batches = self.batches
+		self.batches = [0.5*(batches[i] + batches[i + 1]) for i in range(0, len(batches), 2)]
+		self.batchEnd += self.batchLength
+		self.batchLength *= 2
+
+	def targetMet(self, estimate):
+		if estimate is None:
+			return False
+		if self.targetHalfWidth is not None and estimate['halfWidth'] > self.targetHalfWidth:
+			return False
+		if self.targetPrecision is not None and estimate['halfWidth'] > self.targetPrecision*abs(estimate['mean']):
+			return False
+		return True
+
+	# Returns the confidence interval dict of the steady state mean, with
+	# warmUpTime (the deleted time) and batchLength (of the numBatches
+	# batches used) added, or None while fewer than 10*numBatches batches
+	# have closed.
+	def estimate(self):
+		if len(self.batches) < 10*self.numBatches:
+			return None
+		deleted = mserTruncation(self.batches, 5)
+		kept = self.batches[deleted:]
+		size = len(kept)//self.numBatches
+		kept = kept[len(kept) - size*self.numBatches:]		# drop the oldest leftovers
+		deleted = len(self.batches) - len(kept)
+		means = [math.fsum(kept[i:i + size])/size for i in range(0, len(kept), size)]
+
+		estimate = confidenceInterval(means, self.confidence)
+		estimate['warmUpTime'] = deleted*self.batchLength
+		estimate['batchLength'] = size*self.batchLength
+		return estimate
+
+
+#----------------------------------------------------------------------#
+# Class: TimeAverage
+#
+# Time average of a step function, kept as the area under it. Each
+# record(time, value) adds the area of the previous value up to time
+# with Neumaier compensated summation, so the average stays accurate
+# over runs of millions of time units; the only division is in mean(),
+# when the average is read.
+#
+#----------------------------------------------------------------------#
+class TimeAverage(object):
+	def __init__(self):
+		self.clear()
+
+	def clear(self):
+		self.area = 0.0
+		self.compensation = 0.0		# low order bits lost from area
+		self.time = 0.0
+		self.value = 0
+
+	# Start at time as if the average so far were `average`
+	def start(self, time, average):
+		self.area = float(average)*time
+		self.compensation = 0.0
+		self.time = time
+
+	def record(self, time, value):
+		step = self.value*(time - self.time)
+		area = self.area + step
+		if abs(self.area) >= abs(step):
+			self.compensation += (self.area - area) + step
+		else:
+			self.compensation += (step - area) + self.area
+		self.area = area
+		self.time = time
+		self.value = value
+
+	# Average from 0 to the last recorded time
+	def mean(self):
+		if self.time <= 0:
+			return float(self.value)
+		return (self.area + self.compensation)/self.time
+
+
+#----------------------------------------------------------------------#
+# Class: ClassTimeAverage
+#
+# Time averages of the number of jobs in each class, entries 1 to
+# numClasses (entry 0 is unused, as in the queue's class counts). Count
+# changes are noted with change() and take effect from the next
+# record(time), the way TimeAverage values do. Each class keeps its own
+# compensated area and the time its count last changed, and record()
+# only integrates the classes that changed, so an event costs the same
+# however many classes there are. That per-event work is plain Python:
+# an event touches one or two classes, too few for NumPy to pay off.
+# Only means(), which brings every class up to the given time, uses
+# NumPy when it is installed.
+#
+#----------------------------------------------------------------------#
+class ClassTimeAverage(object):
+	def __init__(self, numClasses = 0):
+		self.clear(numClasses)
+
+	def clear(self, numClasses = None):
+		if numClasses is not None:
+			self.numClasses = numClasses
+		size = self.numClasses + 1
+		self.areas = [0.0] * size
+		self.compensations = [0.0] * size
+		self.counts = [0] * size
+		self.times = [0.0] * size		# time each count last changed
+		self.pending = []				# (class, delta) not yet recorded
+
+	def change(self, priorityClass, delta):
+		self.pending.append((priorityClass, delta))
+
+	def record(self, time):
+		for priorityClass, delta in self.pending:
+			step = self.counts[priorityClass]*(time - self.times[priorityClass])
+			area = self.areas[priorityClass]
+			total = area + step
+			if abs(area) >= abs(step):
+				self.compensations[priorityClass] += (area - total) + step
+			else:
+				self.compensations[priorityClass] += (step - total) + area
+			self.areas[priorityClass] = total
+			self.times[priorityClass] = time
+			self.counts[priorityClass] += delta
+		del self.pending[:]
+
+	# List of the class averages from 0 to time
+	def means(self, time):
+		if time <= 0:
+			return [float(count) for count in self.counts]
+		if numpy is not None:
+			areas = numpy.array(self.areas) + numpy.array(self.compensations)
+			areas += numpy.array(self.counts)*(time - numpy.array(self.times))
+			return (areas/time).tolist()
+		return [(area + compensation + count*(time - changed))/time
+				for area, compensation, count, changed in zip(self.areas, self.compensations, self.counts, self.times)]
@@ -0,0 +1,177 @@
+#----------------------------------------------------------------------#
+# ParameterSweep.py
+#
+# Runs the headless simulator over a grid of parameters (load, Bounded
+# Pareto alpha, percent error range, number of classes, scheduler...)
+# in a pool of worker processes (or threads, for small scans that are
+# not worth the process start up), one simulation per grid point, and
+# collects the results into one table. Every point gets its own seed
+# derived from the sweep seed and the point's position in the grid, so
+# a sweep gives the same table however many workers run it.
+#
+# Usage:
+#	python ParameterSweep.py --scheduler SRPTE Class --load 0.5 0.7 0.9 0.99
+#		--alpha 1.1 1.5 --percErrorMin 0 -20 --percErrorMax 0 20 --numClasses 2 10
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import csv
+import hashlib
+import itertools
+import os
+import sys
+import time
+
+from SimEngine import DISTRIBUTIONS, SCHEDULERS, SEED, runSimulation
+from SimParams import makeParams
+from TraceRecorder import TRACE_POLICIES
+from VariateStreams import VARIATE_MODES, VARIATES_HELP
+
+
+# Seed of the index-th point of a sweep. Hashing keeps the seeds of
+# neighbouring points unrelated, unlike seed + index.
+def pointSeed(seed, index):
+	digest = hashlib.sha256(("%s-%d"%(seed, index)).encode('ascii')).digest()
+	return int.from_bytes(digest[:8], 'little')
+
+
+#----------------------------------------------------------------------#
+# Function: expandGrid
+#
+# Returns the list of points (dicts) in the cross product of the grid,
+# a dict of parameter name -> list of values. The percent error range
+# can be given as 'percError' with (min, max) pairs. numClasses only
+# applies to the class based scheduler, so SRPTE points do not repeat
+# once per number of classes.
+#
+#----------------------------------------------------------------------#
+def expandGrid(grid):
+	names = list(grid)
+	points = []
+	seen = set()
+	for values in itertools.product(*[grid[name] for name in names]):
+		point = dict(zip(names, values))
+		if 'percError' in point:
+			point['percErrorMin'], point['percErrorMax'] = point.pop('percError')
+		if point.get('scheduler', 'SRPTE') == 'SRPTE' and 'numClasses' in point:
+			point['numClasses'] = None
+		key = tuple(sorted(point.items()))
+		if key not in seen:
+			seen.add(key)
+			points.append(point)
+	return points
+
+
+# Runs one point of the sweep; this is what the worker processes call.
+# The point's keys are SimParams field names, None meaning the default.
+def runPoint(index, point, seed):
+	values = dict((name, value) for name, value in point.items() if value is not None)
+	values['seed'] = seed
+	values.setdefault('tracePolicy', 'none')		# only the averages are needed
+
+	start = time.perf_counter()
+	results = runSimulation(*makeParams(**values))
+	results['wallTime'] = time.perf_counter() - start
+	results['point'] = index
+	return results
+
+
+#----------------------------------------------------------------------#
+# Function: runSweep
+#
+# Runs every point of the grid, with the fixed keyword arguments
+# applied to all of them, on `workers` processes (all cores by
+# default), or threads with threads=True. Each simulation owns its
+# machine and random streams, so threads do not share any state.
+# Returns one results dict per point, in grid order.
+# progress, if given, is called with (done, total, results) as each
+# point finishes.
+#
+#----------------------------------------------------------------------#
+def runSweep(grid, seed = SEED, workers = None, progress = None, threads = False, **fixed):
+	points = [dict(fixed, **point) for point in expandGrid(grid)]
+	rows = [None] * len(points)
+	Executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+	with Executor(max_workers = workers) as pool:
+		futures = [pool.submit(runPoint, index, point, pointSeed(seed, index)) for index, point in enumerate(points)]
+		for done, future in enumerate(as_completed(futures), 1):
+			results = future.result()
+			rows[results['point']] = results
+			if progress is not None:
+				progress(done, len(points), results)
+	return rows
+
+
+# Writes the sweep results as CSV, one row per point. List valued
+# results (avgNumJobsPerClass) are written as space separated values.
+def writeTable(rows, path):
+	columns = ['point']
+	for row in rows:
+		for column in row:
+			if column not in columns:
+				columns.append(column)
+
+	folder = os.path.dirname(path)
+	if folder:
+		os.makedirs(folder, exist_ok=True)
+	with open(path, 'w', newline='') as myFile:
+		writer = csv.DictWriter(myFile, fieldnames = columns, restval = '')
+		writer.writeheader()
+		for row in rows:
+			writer.writerow(dict((column, ' '.join(map(str, value)) if isinstance(value, list) else value)
+								for column, value in row.items()))
+	return path
+
+
+def parseArgs(argv):
+	parser = argparse.ArgumentParser(description="Run a grid of simulations on all cores and collect the results.")
+	parser.add_argument('--scheduler', nargs='+', choices=SCHEDULERS, default=['SRPTE'])
+	parser.add_argument('--load', nargs='+', type=float, default=[0.5, 0.7, 0.9, 0.95, 0.99])
+	parser.add_argument('--alpha', nargs='+', type=float, default=[1.5])
+	parser.add_argument('--percErrorMin', nargs='+', type=float, default=[0.0])
+	parser.add_argument('--percErrorMax', nargs='+', type=float, default=[0.0],
+						help="paired with --percErrorMin, one error range per pair")
+	parser.add_argument('--numClasses', nargs='+', type=int, default=[10])
+	parser.add_argument('--arrDist', choices=('Poisson', 'Exponential'), default='Exponential')
+	parser.add_argument('--procRate', type=float, default=0.5)
+	parser.add_argument('--procDist', choices=DISTRIBUTIONS, default='Bounded Pareto')
+	parser.add_argument('--simLength', type=float, default=5000000.0)
+	parser.add_argument('--lower', type=float, default=1)
+	parser.add_argument('--upper', type=float, default=10**6)
+	parser.add_argument('--seed', type=int, default=SEED, help="sweep seed; each point gets its own seed from it")
+	parser.add_argument('--variates', choices=VARIATE_MODES, default='block', help=VARIATES_HELP)
+	parser.add_argument('--tracePolicy', choices=TRACE_POLICIES, default='none')
+	parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+	parser.add_argument('--threads', action='store_true', help="run the points on threads instead of processes")
+	parser.add_argument('--output', default="./SINGLE_SERVER_RESULTS/sweep.csv")
+	args = parser.parse_args(argv)
+	if len(args.percErrorMin) != len(args.percErrorMax):
+		parser.error("--percErrorMin and --percErrorMax need the same number of values")
+	return args
+
+
+#----------------------------------------------------------------------#
+def main(argv = None):
+	args = parseArgs(argv)
+	grid = {'scheduler': args.scheduler,
+			'load': args.load,
+			'alpha': args.alpha,
+			'percError': list(zip(args.percErrorMin, args.percErrorMax)),
+			'numClasses': args.numClasses}
+
+	def progress(done, total, results):
+		print ("%d/%d  %s load=%s alpha=%s avgNumJobs=%.4f  (%.1fs)"%(done, total, results['scheduler'],
+				results['load'], results['alpha'], results['avgNumJobs'], results['wallTime']))
+
+	rows = runSweep(grid, seed = args.seed, workers = args.workers, progress = progress, threads = args.threads,
+					arrDist = args.arrDist, procRate = args.procRate, procDist = args.procDist,
+					simLength = args.simLength, lower = args.lower, upper = args.upper,
+					variates = args.variates, tracePolicy = args.tracePolicy)
+	print ("Wrote %s"%writeTable(rows, args.output))
+	return 0
+
+
+if __name__ == '__main__': sys.exit(main())
@@ -0,0 +1,147 @@
+#----------------------------------------------------------------------#
+# Profiler.py
+#
+# Per-phase timing of one simulation run. A PhaseProfiler replaces the
+# methods that make up each phase of the event loop (arrival generation,
+# job setup, queue insert, class assignment, statistics, file output,
+# console output) with timed wrappers for the length of the run, and
+# puts the originals back afterwards. When profiling is off nothing is
+# wrapped, so the event loop runs exactly as without it.
+#
+# Times are exclusive: a phase called from inside another (a queue
+# insert during class assignment, a results write during statistics)
+# is counted in its own row only. Whatever is not in any phase is shown
+# as the event loop's own time. The wrappers add a little to every
+# timed call, so compare phases with each other rather than with an
+# unprofiled run.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import time
+
+PROFILE_PHASES = ('arrival generation', 'job setup', 'queue insert', 'class assignment',
+				'statistics', 'file output', 'console output')
+LOOP_PHASE = 'event loop (other)'
+
+# Methods making up each phase of a machine's event loop, as (phase,
+# attribute of the machine that owns them or None for the machine
+# itself, method names). Names a machine does not have are skipped, so
+# this one map serves SimEngine and every GUI script.
+MACHINE_PHASES = (
+	('arrival generation', None, ('setArrivalDist',)),
+	('job setup', None, ('newJob',)),
+	('queue insert', 'Queue', ('insert',)),
+	('class assignment', None, ('assignClass',)),
+	('statistics', None, ('calcNumJobs', 'calcNumJobsPerClass', 'calcLoadPerClass', 'recordCompletion')),
+	('file output', None, ('saveNumJobs', 'saveAvgNumJobs', 'saveLoadPerClass')),
+	('console output', None, ('logArrival', 'logInjection', 'logClass', 'logStart', 'logPreempt', 'logCompletion')),
+)
+
+_MISSING = object()
+
+
+# Table of profile rows, as returned by PhaseProfiler.rows
+def formatProfile(rows):
+	lines = ["%-20s %12s %12s %14s %8s"%('phase', 'calls', 'time (s)', 'per call (us)', '% run')]
+	for row in rows:
+		perCall = "" if row['calls'] is None else "%14.3f"%(1e6*row['perCall'])
+		calls = "" if row['calls'] is None else row['calls']
+		lines.append("%-20s %12s %12.4f %14s %8.1f"%(row['phase'], calls, row['time'], perCall, row['share']))
+	return "\n".join(lines)
+
+
+#----------------------------------------------------------------------#
+# Class: PhaseProfiler
+#
+# Accumulates wall time and call counts per phase between start() and
+# stop(). attach(phase, owner, *names) times the named methods (or
+# callable attributes) of owner, which may be an instance or a class;
+# attributes that are None are skipped. detach() undoes every attach.
+#
+#----------------------------------------------------------------------#
+class PhaseProfiler(object):
+	def __init__(self, phases = PROFILE_PHASES):
+		self.times = dict.fromkeys(phases, 0.0)
+		self.calls = dict.fromkeys(phases, 0)
+		self.stack = []			# time spent in phases called by each open call
+		self.patched = []		# (owner, name, original own attribute or _MISSING)
+		self.startTime = None
+		self.stopTime = None
+
+	def timed(self, phase, function):
+		times = self.times
+		calls = self.calls
+		stack = self.stack
+		clock = time.perf_counter
+
+		def timedCall(*args, **kwargs):
+			stack.append(0.0)
+			start = clock()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				elapsed = clock() - start
+				times[phase] += elapsed - stack.pop()
+				calls[phase] += 1
+				if stack:
+					stack[-1] += elapsed
+		return timedCall
+
+	def attach(self, phase, owner, *names):
+		if phase not in self.times:
+			self.times[phase] = 0.0
+			self.calls[phase] = 0
+		for name in names:
+			function = getattr(owner, name, None)
+			if function is None:
+				continue
+			self.patched.append((owner, name, getattr(owner, '__dict__', {}).get(name, _MISSING)))
+			setattr(owner, name, self.timed(phase, function))
+
+	def detach(self):
+		for owner, name, original in reversed(self.patched):
+			if original is _MISSING:
+				delattr(owner, name)
+			else:
+				setattr(owner, name, original)
+		self.patched = []
+
+	def start(self):
+		self.startTime = time.perf_counter()
+		self.stopTime = None
+
+	def stop(self):
+		self.stopTime = time.perf_counter()
+
+	# Total wall time of the run so far
+	def elapsed(self):
+		if self.startTime is None:
+			return 0.0
+		return (self.stopTime if self.stopTime is not None else time.perf_counter()) - self.startTime
+
+	# One dict per phase (phase, calls, time, perCall, share of the run in
+	# percent), then the event loop's own time and the total
+	def rows(self):
+		total = self.elapsed()
+		scale = 100.0/total if total > 0 else 0.0
+		rows = []
+		for phase in self.times:
+			calls = self.calls[phase]
+			rows.append({'phase' : phase, 'calls' : calls, 'time' : self.times[phase],
+						'perCall' : self.times[phase]/calls if calls else 0.0, 'share' : scale*self.times[phase]})
+		other = total - sum(self.times.values())
+		rows.append({'phase' : LOOP_PHASE, 'calls' : None, 'time' : other, 'perCall' : None, 'share' : scale*other})
+		rows.append({'phase' : 'total', 'calls' : None, 'time' : total, 'perCall' : None, 'share' : 100.0 if total > 0 else 0.0})
+		return rows
+
+	def table(self):
+		return formatProfile(self.rows())
+
+
+# Wrap the methods of each phase of machine for profiler, as listed in
+# MACHINE_PHASES; undone by profiler.detach()
+def attachMachine(profiler, machine):
+	for phase, part, names in MACHINE_PHASES:
+		owner = machine if part is None else getattr(machine, part)
+		profiler.attach(phase, owner, *names)
@@ -0,0 +1,112 @@
+#----------------------------------------------------------------------#
+# Progress.py
+#
+# Progress reports for long runs: simulated time, events per wall
+# second, queue length, memory in use and the estimated time left to
+# simLength. The event loop only compares its arrival counter with a
+# threshold; every PROGRESS_CHECK_EVENTS arrivals it hands the meter
+# its state, and the meter calls back at most once per interval wall
+# seconds. The callback may be print (SimEngine --progress), the GUI
+# status bar or any function taking a ProgressReport.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from collections import namedtuple
+import os
+import sys
+import time
+
+try:
+	import resource
+except ImportError:		# Unix only
+	resource = None
+
+PROGRESS_INTERVAL = 1.0			# wall seconds between reports
+PROGRESS_CHECK_EVENTS = 1024	# arrivals between looks at the wall clock
+
+# eventsPerSec is the rate since the previous report (over the whole
+# run in the final report, which has done set); eta is in wall
+# seconds (None until simulated time has advanced); memory is in bytes
+# (None when it cannot be read).
+ProgressReport = namedtuple('ProgressReport', 'simTime simLength fraction events eventsPerSec queueLength memory elapsed eta done')
+
+
+# Peak resident memory of this process in bytes, or None
+def peakMemory():
+	if resource is None:
+		return None
+	peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+	return peak if sys.platform == 'darwin' else peak * 1024		# bytes on macOS, KiB elsewhere
+
+
+# Resident memory of this process in bytes. Reads /proc where there is
+# one, otherwise falls back to the peak resident size.
+def memoryInUse():
+	try:
+		with open("/proc/self/statm") as statm:
+			return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+	except (OSError, ValueError, IndexError, AttributeError):
+		return peakMemory()
+
+
+def formatDuration(seconds):
+	if seconds is None:
+		return "--:--:--"
+	minutes, seconds = divmod(int(seconds + 0.5), 60)
+	hours, minutes = divmod(minutes, 60)
+	return "%d:%02d:%02d"%(hours, minutes, seconds)
+
+
+# One line summary of a report, as shown in the status bar
+def formatProgress(report):
+	memory = "?" if report.memory is None else "%.1f MB"%(report.memory/1048576.0)
+	return "%s %5.1f%% | t = %.1f / %.1f | %d events/s | queue %d | %s | %s %s"%(
+			"Finished" if report.done else "Simulating...", 100*report.fraction, report.simTime, report.simLength,
+			report.eventsPerSec, report.queueLength, memory, "elapsed" if report.done else "ETA",
+			formatDuration(report.elapsed if report.done else report.eta))
+
+
+#----------------------------------------------------------------------#
+# Class: ProgressMeter
+#
+# Builds ProgressReports for one run and passes them to callback.
+# sample() is cheap when no report is due; finish() always reports.
+#
+#----------------------------------------------------------------------#
+class ProgressMeter(object):
+	def __init__(self, simLength, callback, interval = PROGRESS_INTERVAL):
+		if interval <= 0:
+			raise ValueError("Progress interval must be a non-zero value!")
+		self.simLength = simLength
+		self.callback = callback
+		self.interval = interval
+		self.start()
+
+	def start(self):
+		self.startWall = self.lastWall = time.perf_counter()
+		self.lastEvents = 0
+		self.nextReport = self.startWall + self.interval
+
+	def sample(self, simTime, events, queueLength):
+		now = time.perf_counter()
+		if now >= self.nextReport:
+			self.report(now, simTime, events, queueLength, False)
+
+	def finish(self, simTime, events, queueLength):
+		self.report(time.perf_counter(), simTime, events, queueLength, True)
+
+	def report(self, now, simTime, events, queueLength, done):
+		elapsed = now - self.startWall
+		if done:
+			self.lastWall, self.lastEvents = self.startWall, 0
+		eventsPerSec = (events - self.lastEvents)/(now - self.lastWall) if now > self.lastWall else 0.0
+		fraction = min(simTime/self.simLength, 1.0)
+		eta = None
+		if simTime > 0:
+			eta = 0.0 if done else max(self.simLength - simTime, 0.0)*elapsed/simTime
+		self.lastWall = now
+		self.lastEvents = events
+		self.nextReport = now + self.interval
+		self.callback(ProgressReport(simTime, self.simLength, fraction, events, eventsPerSec, queueLength,
+									memoryInUse(), elapsed, eta, done))
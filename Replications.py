@@ -0,0 +1,157 @@
+#----------------------------------------------------------------------#
+# Replications.py
+#
+# Runs R independent replications of one simulation, each from its own
+# reproducible random substream, in a pool of worker processes. Reports
+# the mean, variance and confidence interval across replications of the
+# average number in system, the average time in system and (for the
+# class based scheduler) the average number of jobs in each class.
+#
+# Usage:
+#	python Replications.py --scheduler SRPTE --load 0.99 --alpha 1.1 --replications 30
+#	python Replications.py --scheduler Class --numClasses 10 --replications 30 --confidence 0.99
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import csv
+import hashlib
+import os
+import sys
+
+from OutputAnalysis import DEFAULT_CONFIDENCE, confidenceInterval
+from ParameterSweep import runPoint
+from SimEngine import DISTRIBUTIONS, SCHEDULERS, SEED
+from TraceRecorder import TRACE_POLICIES
+from VariateStreams import VARIATE_MODES, VARIATES_HELP
+
+# Per-replication results summarised across replications
+SUMMARY_MEASURES = ('avgNumJobs', 'avgTimeSys')
+
+
+# Seed of the substream of the index-th replication. Seeds come from a
+# hash of (seed, index), so the substreams are unrelated to each other
+# and to the seeds ParameterSweep gives its grid points.
+def replicationSeed(seed, index):
+	digest = hashlib.sha256(("%s-replication-%d"%(seed, index)).encode('ascii')).digest()
+	return int.from_bytes(digest[:8], 'little')
+
+
+#----------------------------------------------------------------------#
+# Function: summarize
+#
+# Returns {measure: confidence interval dict} over the replication
+# results. avgNumJobsPerClass, when present, is summarised per class
+# as avgNumJobsClass1, avgNumJobsClass2, ... (index 0 of the list is
+# not a class and is skipped)
+#
+#----------------------------------------------------------------------#
+def summarize(rows, confidence = DEFAULT_CONFIDENCE):
+	summary = {}
+	for measure in SUMMARY_MEASURES:
+		summary[measure] = confidenceInterval([row[measure] for row in rows], confidence)
+	if rows and 'avgNumJobsPerClass' in rows[0]:
+		for i, values in enumerate(zip(*[row['avgNumJobsPerClass'] for row in rows])):
+			if i > 0:
+				summary['avgNumJobsClass%d'%i] = confidenceInterval(values, confidence)
+	return summary
+
+
+#----------------------------------------------------------------------#
+# Function: runReplications
+#
+# Runs `replications` copies of the simulation described by the keyword
+# arguments (SimParams field names), replication r seeded with
+# replicationSeed(seed, r), on `workers` processes (or threads with
+# threads=True). Returns (rows, summary): the per-replication results
+# in replication order and their summary. progress, if given, is called
+# with (done, total, results) as each replication finishes.
+#
+#----------------------------------------------------------------------#
+def runReplications(replications, seed = SEED, confidence = DEFAULT_CONFIDENCE, workers = None, progress = None,
+					threads = False, **params):
+	if replications < 2:
+		raise ValueError("Need at least 2 replications for a confidence interval!")
+	if params.get('scheduler', 'SRPTE') == 'SRPTE':
+		params['numClasses'] = None
+
+	rows = [None] * replications
+	Executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+	with Executor(max_workers = workers) as pool:
+		futures = [pool.submit(runPoint, index, params, replicationSeed(seed, index)) for index in range(replications)]
+		for done, future in enumerate(as_completed(futures), 1):
+			results = future.result()
+			rows[results['point']] = results
+			if progress is not None:
+				progress(done, replications, results)
+	for row in rows:
+		row['replication'] = row.pop('point')
+	return rows, summarize(rows, confidence)
+
+
+# Writes the summary as CSV, one row per measure
+def writeSummary(summary, path):
+	folder = os.path.dirname(path)
+	if folder:
+		os.makedirs(folder, exist_ok=True)
+	columns = ['measure', 'n', 'mean', 'variance', 'stdDev', 'confidence', 'halfWidth', 'low', 'high']
+	with open(path, 'w', newline='') as myFile:
+		writer = csv.DictWriter(myFile, fieldnames = columns)
+		writer.writeheader()
+		for measure, interval in summary.items():
+			writer.writerow(dict(interval, measure = measure))
+	return path
+
+
+def parseArgs(argv):
+	parser = argparse.ArgumentParser(description="Run independent replications of a simulation and report confidence intervals.")
+	parser.add_argument('--replications', type=int, default=10)
+	parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+	parser.add_argument('--scheduler', choices=SCHEDULERS, default='SRPTE')
+	parser.add_argument('--load', type=float, default=0.95)
+	parser.add_argument('--arrDist', choices=('Poisson', 'Exponential'), default='Exponential')
+	parser.add_argument('--procRate', type=float, default=0.5)
+	parser.add_argument('--procDist', choices=DISTRIBUTIONS, default='Bounded Pareto')
+	parser.add_argument('--percErrorMin', type=float, default=0.0)
+	parser.add_argument('--percErrorMax', type=float, default=0.0)
+	parser.add_argument('--numClasses', type=int, default=10)
+	parser.add_argument('--simLength', type=float, default=5000000.0)
+	parser.add_argument('--alpha', type=float, default=1.5)
+	parser.add_argument('--lower', type=float, default=1)
+	parser.add_argument('--upper', type=float, default=10**6)
+	parser.add_argument('--seed', type=int, default=SEED, help="replication r runs from a substream derived from this seed")
+	parser.add_argument('--variates', choices=VARIATE_MODES, default='block', help=VARIATES_HELP)
+	parser.add_argument('--tracePolicy', choices=TRACE_POLICIES, default='none')
+	parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+	parser.add_argument('--threads', action='store_true', help="run the replications on threads instead of processes")
+	parser.add_argument('--output', default=None, help="write the summary as CSV to this path")
+	return parser.parse_args(argv)
+
+
+#----------------------------------------------------------------------#
+def main(argv = None):
+	args = parseArgs(argv)
+
+	def progress(done, total, results):
+		print ("%d/%d  replication %d avgNumJobs=%.4f avgTimeSys=%.4f  (%.1fs)"%(done, total, results['point'],
+				results['avgNumJobs'], results['avgTimeSys'], results['wallTime']))
+
+	rows, summary = runReplications(args.replications, seed = args.seed, confidence = args.confidence,
+									workers = args.workers, progress = progress, threads = args.threads,
+									scheduler = args.scheduler, load = args.load, arrDist = args.arrDist,
+									procRate = args.procRate, procDist = args.procDist, percErrorMin = args.percErrorMin,
+									percErrorMax = args.percErrorMax, numClasses = args.numClasses, simLength = args.simLength,
+									alpha = args.alpha, lower = args.lower, upper = args.upper,
+									variates = args.variates, tracePolicy = args.tracePolicy)
+	print ("%d replications, %g%% confidence intervals:"%(args.replications, 100*args.confidence))
+	for measure, interval in summary.items():
+		print ("%-20s mean = %.6f  variance = %.6f  CI = [%.6f, %.6f]"%(measure, interval['mean'],
+				interval['variance'], interval['low'], interval['high']))
+	if args.output is not None:
+		print ("Wrote %s"%writeSummary(summary, args.output))
+	return 0
+
+
+if __name__ == '__main__': sys.exit(main())
@@ -0,0 +1,262 @@
+#----------------------------------------------------------------------#
+# ResultsWriter.py
+#
+# Buffered writers for the per-event results files. Output streams are
+# opened once per run and rows are collected in memory, then written
+# in batches of flushSize rows. ResultsWriter writes exactly the text
+# the old open/append/close per event produced; TraceWriter writes the
+# same time,value rows as binary float64 columns that can be memory
+# mapped back with loadTrace.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from array import array
+import ast
+import mmap
+import os
+import sys
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+
+#----------------------------------------------------------------------#
+# Class: ResultsWriter
+#
+# This class keeps one open append stream and one row buffer per
+# results file. Call close() (or use it in a with block) when the run
+# ends so the remaining rows are written even if the run stopped early
+# or raised an exception.
+#
+#----------------------------------------------------------------------#
+class ResultsWriter(object):
+	def __init__(self, flushSize = 10000):
+		if flushSize < 1:
+			raise ValueError("Flush size must be at least 1!")
+		self.flushSize = flushSize
+		self.streams = {}		# path -> open file
+		self.buffers = {}		# path -> list of pending rows
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+		return False
+
+	def openPath(self, path):
+		folder = os.path.dirname(path)
+		if folder:
+			os.makedirs(folder, exist_ok=True)
+		self.streams[path] = open(path, "a")
+		self.buffers[path] = []
+		return self.buffers[path]
+
+	# Queue one row (already formatted, including the newline)
+	def write(self, path, text):
+		buffer = self.buffers.get(path)
+		if buffer is None:
+			buffer = self.openPath(path)
+		buffer.append(text)
+		if len(buffer) >= self.flushSize:
+			self.flushPath(path)
+
+	# Format and queue one time,value row of a number-in-system trace
+	def writeRow(self, path, time, value):
+		self.write(path, "%f,%f"%(time, value) + "\n")
+
+	def flushPath(self, path):
+		buffer = self.buffers[path]
+		if buffer:
+			self.streams[path].write("".join(buffer))
+			del buffer[:]
+		self.streams[path].flush()
+
+	def flush(self):
+		for path in self.streams:
+			self.flushPath(path)
+
+	# Write out anything still buffered and close every stream
+	def close(self):
+		try:
+			for path in self.streams:
+				try:
+					self.flushPath(path)
+				finally:
+					self.streams[path].close()
+		finally:
+			self.streams = {}
+			self.buffers = {}
+
+
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+NPY_HEADER_SIZE = 128		# magic + length + header dict, fixed so it can be rewritten in place
+NPY_DESCR = '<f8' if sys.byteorder == 'little' else '>f8'
+TRACE_COLUMNS = ('time', 'value')
+
+
+def npyHeader(length):
+	header = "{'descr': '%s', 'fortran_order': False, 'shape': (%d,), }"%(NPY_DESCR, length)
+	header = header.ljust(NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - 1) + "\n"
+	return NPY_MAGIC + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+
+# Returns the number of float64 values an existing column file holds
+def npyLength(path):
+	with open(path, 'rb') as myFile:
+		prefix = myFile.read(len(NPY_MAGIC) + 2)
+		if prefix[:len(NPY_MAGIC)] != NPY_MAGIC:
+			raise ValueError("%s is not a version 1.0 .npy file"%path)
+		header = ast.literal_eval(myFile.read(int.from_bytes(prefix[-2:], 'little')).decode('latin1'))
+	if header['descr'] != NPY_DESCR or header['fortran_order'] or len(header['shape']) != 1:
+		raise ValueError("%s is not a 1-d %s column"%(path, NPY_DESCR))
+	return header['shape'][0]
+
+
+def tracePath(base, column):
+	return "%s.%s.npy"%(base, column)
+
+
+#----------------------------------------------------------------------#
+# Class: TraceWriter
+#
+# This class writes number-in-system traces as two float64 columns
+# (<base>.time.npy and <base>.value.npy). Each column is a plain 1-d
+# .npy file; rows are appended in chunks of flushSize and the header
+# is rewritten after every chunk, so a run that dies part way is still
+# readable up to its last flush. Existing traces are appended to, as
+# with the text files.
+#
+#----------------------------------------------------------------------#
+class TraceWriter(object):
+	def __init__(self, flushSize = 10000):
+		if flushSize < 1:
+			raise ValueError("Flush size must be at least 1!")
+		self.flushSize = flushSize
+		self.streams = {}		# base -> (time file, value file)
+		self.buffers = {}		# base -> (time array, value array)
+		self.lengths = {}		# base -> rows already on disk
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, excType, excValue, traceback):
+		self.close()
+		return False
+
+	def openPath(self, base):
+		folder = os.path.dirname(base)
+		if folder:
+			os.makedirs(folder, exist_ok=True)
+
+		paths = [tracePath(base, column) for column in TRACE_COLUMNS]
+		if all(os.path.exists(path) for path in paths):
+			lengths = [npyLength(path) for path in paths]
+			if lengths[0] != lengths[1]:
+				raise ValueError("Trace %s has columns of different lengths"%base)
+			streams = []
+			for path in paths:
+				stream = open(path, 'r+b')
+				stream.seek(NPY_HEADER_SIZE + 8*lengths[0])
+				stream.truncate()			# drop any partial chunk from an interrupted run
+				streams.append(stream)
+			self.lengths[base] = lengths[0]
+		else:
+			streams = [open(path, 'wb') for path in paths]
+			for stream in streams:
+				stream.write(npyHeader(0))
+			self.lengths[base] = 0
+
+		self.streams[base] = tuple(streams)
+		self.buffers[base] = (array('d'), array('d'))
+		return self.buffers[base]
+
+	# Queue one time,value row
+	def writeRow(self, base, time, value):
+		buffers = self.buffers.get(base)
+		if buffers is None:
+			buffers = self.openPath(base)
+		buffers[0].append(time)
+		buffers[1].append(value)
+		if len(buffers[0]) >= self.flushSize:
+			self.flushPath(base)
+
+	def flushPath(self, base):
+		buffers = self.buffers[base]
+		streams = self.streams[base]
+		if len(buffers[0]) > 0:
+			self.lengths[base] += len(buffers[0])
+			for stream, buffer in zip(streams, buffers):
+				buffer.tofile(stream)
+				del buffer[:]
+				stream.seek(0)
+				stream.write(npyHeader(self.lengths[base]))
+				stream.seek(0, os.SEEK_END)
+		for stream in streams:
+			stream.flush()
+
+	def flush(self):
+		for base in self.streams:
+			self.flushPath(base)
+
+	# Write out anything still buffered and close every stream
+	def close(self):
+		try:
+			for base in self.streams:
+				try:
+					self.flushPath(base)
+				finally:
+					for stream in self.streams[base]:
+						stream.close()
+		finally:
+			self.streams = {}
+			self.buffers = {}
+			self.lengths = {}
+
+
+#----------------------------------------------------------------------#
+# Function: loadTrace
+#
+# Returns the (time, value) columns of a trace written by TraceWriter.
+# With memoryMap the columns are memory mapped rather than read, so even a
+# 5,000,000 time unit run opens instantly. NumPy arrays are returned
+# when NumPy is installed, otherwise float views over the mapping.
+#
+#----------------------------------------------------------------------#
+def loadTrace(base, memoryMap = True):
+	columns = []
+	for column in TRACE_COLUMNS:
+		path = tracePath(base, column)
+		length = npyLength(path)
+		if numpy is not None:
+			if length == 0:
+				columns.append(numpy.zeros(0))
+			else:
+				columns.append(numpy.load(path, mmap_mode='r' if memoryMap else None))
+		elif memoryMap and length > 0:
+			with open(path, 'rb') as myFile:
+				mapping = mmap.mmap(myFile.fileno(), 0, access=mmap.ACCESS_READ)
+			columns.append(memoryview(mapping)[NPY_HEADER_SIZE:NPY_HEADER_SIZE + 8*length].cast('d'))
+		else:
+			values = array('d')
+			with open(path, 'rb') as myFile:
+				myFile.seek(NPY_HEADER_SIZE)
+				values.fromfile(myFile, length)
+			columns.append(values)
+	return tuple(columns)
+
+
+# Converts an old "%f,%f" text results file into a binary trace
+def convertTextTrace(textPath, base = None, flushSize = 100000):
+	if base is None:
+		base = os.path.splitext(textPath)[0]
+	with TraceWriter(flushSize) as writer:
+		with open(textPath) as myFile:
+			for line in myFile:
+				if line.strip():
+					time, value = line.split(',')
+					writer.writeRow(base, float(time), float(value))
+	return base
@@ -0,0 +1,680 @@
+#----------------------------------------------------------------------#
+# SimEngine.py
+#
+# Simulation engine for the single server schedulers. The MachineClass
+# of each GUI script subclasses the machines here; run from this module
+# no Tk widgets are created, so long simulations are not slowed down by
+# console redraws.
+#
+# Usage:
+#	python SimEngine.py --scheduler SRPTE --load 0.95 --simLength 5000000
+#	python SimEngine.py --scheduler Class --numClasses 10 --save
+#	python SimEngine.py --load 0.5 --targetPrecision 0.01	(stop when E[N] is known to 1%)
+#	python SimEngine.py --load 0.99 --simLength 50000000 --progress
+#	python SimEngine.py --scheduler Class --numClasses 50 --profile
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import argparse
+import os
+import sys
+
+from EventCalendar import ARRIVAL, COMPLETION, INJECTION, STOP, EventCalendar
+from EventLog import LOG_LEVELS, EventLog, FileSink, TextSink
+from JobQueues import ClassBucketQueue, ERPTHeapQueue, ERPTWindow, JobClass
+from OutputAnalysis import DEFAULT_CONFIDENCE, BatchMeans, ClassTimeAverage, TimeAverage
+from Profiler import PhaseProfiler, attachMachine, formatProfile
+from Progress import PROGRESS_CHECK_EVENTS, PROGRESS_INTERVAL, ProgressMeter, formatProgress
+from ResultsWriter import ResultsWriter, TraceWriter
+from SimParams import SEED, AnalysisOptions, OutputOptions, Scenario, makeParams
+from TraceRecorder import TRACE_POLICIES, makeTraceRecorder
+from VariateStreams import DEFAULT_BLOCK_SIZE, VARIATE_MODES, VARIATES_HELP, BoundedPareto, compileEquation, makeVariates
+
+SCHEDULERS = ('SRPTE', 'Class')
+DISTRIBUTIONS = ('Poisson', 'Exponential', 'Uniform', 'Bounded Pareto', 'Custom')
+RESULTS_FORMATS = ('text', 'npy')
+
+
+#----------------------------------------------------------------------#
+# Class: MachineBase
+#
+# This class holds the state and statistics shared by the headless
+# schedulers. Each instance owns its queue, clock and random stream.
+# The GUI scripts run subclasses of these machines, which only add
+# their results folder, the large job injections and the Tk sinks.
+# Of the scenario, the machine keeps the size distribution and random
+# stream; the run inputs (load, rates, errors, length) are passed to
+# run, as the GUIs read them from their Input frame.
+#
+#----------------------------------------------------------------------#
+class MachineBase(object):
+	resultsFolder = ''
+	resultsPrefix = ''
+	resultsSuffix = ''
+	hasClasses = False		# jobs are given a priorityClass
+	injectionTimes = ()		# times of the INJECTION events, see injectionEvent
+
+	def __init__(self, scenario = Scenario(), output = OutputOptions(), analysis = AnalysisOptions(), rng = None):
+		self.seed = scenario.seed
+		self.boundedPareto = BoundedPareto(scenario.alpha, scenario.lower, scenario.upper)
+		self.customEquation = scenario.customEquation
+		# 'random' matches the GUI draw for draw, and continues rng when given
+		self.variates = makeVariates(scenario.variates, scenario.seed, self.boundedPareto, scenario.customEquation, scenario.blockSize, rng)
+		self.saveResults = output.saveResults
+		self.resultsDir = output.resultsDir
+		if output.resultsFormat not in RESULTS_FORMATS:
+			raise ValueError("Unknown results format %r, expected one of %s"%(output.resultsFormat, ', '.join(RESULTS_FORMATS)))
+		self.resultsFormat = output.resultsFormat
+		self.writer = None
+		if output.saveResults:
+			self.writer = ResultsWriter(output.flushSize) if output.resultsFormat == 'text' else TraceWriter(output.flushSize)
+
+		# Event log, off unless given somewhere to go. console is a callable
+		# taking one line of text, logFile a CSV path; logLevel defaults to
+		# every event when either is given.
+		sinks = []
+		if output.console is not None:
+			sinks.append(TextSink(output.console))
+		if output.logFile is not None:
+			sinks.append(FileSink(output.logFile, output.flushSize))
+		logLevel = output.logLevel
+		if logLevel is None:
+			logLevel = 'debug' if sinks else 'off'
+		self.eventLog = EventLog(logLevel, sinks)
+
+		# Progress reports, passed to progress (a callable taking a
+		# ProgressReport) about every progressInterval wall seconds
+		self.progress = output.progress
+		self.progressInterval = output.progressInterval
+		self.progressMeter = None
+		self.progressCheck = float('inf')		# arrival count of the next wall clock check
+
+		# Time spent in each phase of the run, only measured when asked for
+		self.profiler = PhaseProfiler() if output.profile else None
+
+		self.processRate = 0
+		self.arrivalRate = 0
+
+		self.Queue = self.makeQueue()
+		self.JobOrderOut = []			# jobIDs in completion order
+		self.CurrentTime = 0.0
+		self.ServiceStartTime = 0
+		self.ServerBusy = False
+		self.StopSim = False
+		self.calendar = EventCalendar()		# future events, except the next arrival
+		self.pendingCompletion = None
+		self.numJobsAverage = TimeAverage()		# area under the number in system
+
+		# Number of jobs over time, recorded as set by tracePolicy when the run starts
+		self.traceOptions = (output.tracePolicy, output.traceEvery, output.traceInterval, output.traceMaxPoints)
+		if output.tracePolicy not in TRACE_POLICIES:
+			raise ValueError("Unknown trace policy %r, expected one of %s"%(output.tracePolicy, ', '.join(TRACE_POLICIES)))
+		self.trace = None
+
+		# Steady state estimate of the number in system. With a target half
+		# width (or relative precision) the run stops as soon as it is met,
+		# and simLength only caps its length.
+		self.batchMeans = None
+		if analysis.batchMeans or analysis.targetHalfWidth is not None or analysis.targetPrecision is not None:
+			self.batchMeans = BatchMeans(analysis.batchLength, analysis.maxBatches, analysis.numBatches, analysis.confidence,
+										analysis.targetHalfWidth, analysis.targetPrecision)
+
+		self.numCompleted = 0
+		self.sumTimeSys = 0.0
+		self.sumPercError = 0.0
+		self.meanProcTime = 0.0
+		self.sumSqProcTime = 0.0		# sum of squared deviations (Welford)
+
+		self.ctr = 0
+
+	def stopSimulation(self):
+		self.StopSim = True
+
+	def setArrProcRates(self, load, procRate, procDist):
+		if procDist == 'Bounded Pareto':
+			self.processRate = self.boundedPareto.processRate
+		else:
+			self.processRate = procRate
+
+		self.arrivalRate = float(load) * self.processRate
+
+	# Draws the size and percent error of a new job arriving now
+	def newJob(self, jobID, load, procRate, procDist, percErrorMin, percErrorMax):
+		procTime = self.variates.serviceTime(procRate, procDist)
+		self.setArrProcRates(load, procRate, procDist)
+		percentError = self.variates.percentError(percErrorMin, percErrorMax)
+		return JobClass(jobID, self.CurrentTime, procTime, percentError)
+
+	def setArrivalDist(self, arrRate, arrDist):
+		return self.variates.interarrival(arrRate, arrDist)
+
+	def getProcessingJob(self):
+		currentJob = self.Queue.headJob
+		return currentJob
+
+	#update data
+	def updateJob(self):
+		currentJob = self.getProcessingJob()
+		serviceTime = self.CurrentTime - self.ServiceStartTime
+		currentJob.RPT -= serviceTime
+		currentJob.ERPT -= serviceTime
+
+	# Time average number in system up to the last event
+	@property
+	def AvgNumJobs(self):
+		return self.numJobsAverage.mean()
+
+	def calcNumJobs(self, jobID, load):
+		self.currentNumJobs = self.Queue.Size #NOTE: This includes job in service
+
+		# If one job in system
+		if(jobID == 0):
+			self.numJobsAverage.start(self.CurrentTime, 1) # First event is always create new job
+		self.numJobsAverage.record(self.CurrentTime, self.currentNumJobs)
+
+		# The average is only divided out when something keeps it per event
+		if self.recordAverages:
+			avgNumJobs = self.AvgNumJobs
+			self.trace.record(self.CurrentTime, self.currentNumJobs, avgNumJobs)
+			if self.saveResults:
+				self.saveNumJobs(load, self.CurrentTime, self.currentNumJobs)
+				self.saveAvgNumJobs(load, self.CurrentTime, avgNumJobs)
+		if self.batchMeans is not None:
+			self.batchMeans.record(self.CurrentTime, self.currentNumJobs)
+			if self.batchMeans.converged:
+				self.StopSim = True
+
+	# Text results end in .txt; binary traces use this as the base of
+	# their .time.npy and .value.npy column files
+	def resultsPath(self, kind, load):
+		scaledLoad = int(load * 100)
+		path = os.path.join(self.resultsDir, self.resultsFolder, "%s_%s_load=%s_alpha=%s_servers=1%s"%(self.resultsPrefix, kind, scaledLoad, self.boundedPareto.alpha, self.resultsSuffix))
+		if self.resultsFormat == 'text':
+			path += ".txt"
+		return path
+
+	def saveNumJobs(self, load, time, numJobs):
+		self.writer.writeRow(self.numPath, time, numJobs)
+
+	def saveAvgNumJobs(self, load, time, avgNumJobs):
+		self.writer.writeRow(self.avgPath, time, avgNumJobs)
+
+	# Keep running totals instead of per job lists, so memory stays flat
+	def recordCompletion(self, job):
+		self.numCompleted += 1
+		self.sumTimeSys += self.CurrentTime - job.arrivalTime
+		self.sumPercError += abs(job.percentError)
+		delta = job.procTime - self.meanProcTime
+		self.meanProcTime += delta/self.numCompleted
+		self.sumSqProcTime += delta*(job.procTime - self.meanProcTime)
+
+	def prepareResults(self, load, simLength):
+		tracePolicy, traceEvery, traceInterval, traceMaxPoints = self.traceOptions
+		self.trace = makeTraceRecorder(tracePolicy, every = traceEvery, interval = traceInterval, maxPoints = traceMaxPoints, simLength = simLength)
+		self.recordAverages = self.saveResults or tracePolicy != 'none'
+		self.numJobsAverage.clear()
+		self.resolveLog()
+		if self.progress is not None:
+			self.progressMeter = ProgressMeter(simLength, self.progress, self.progressInterval)
+			self.progressCheck = self.ctr + PROGRESS_CHECK_EVENTS
+		if self.profiler is not None:
+			self.attachProfiler(self.profiler)
+			self.profiler.start()
+		if self.batchMeans is not None:
+			self.batchMeans.clear()
+		if self.saveResults:
+			self.numPath = self.resultsPath("Num", load)
+			self.avgPath = self.resultsPath("Avg", load)
+
+	# Look up once per run which events are logged; each is None when off.
+	# Arrivals are logged before the job has a class.
+	def resolveLog(self):
+		self.logArrival = self.eventLog.emitter('arrival')
+		self.logInjection = self.eventLog.emitter('injection')
+		self.logClass = self.eventLog.emitter('class', self.hasClasses)
+		self.logStart = self.eventLog.emitter('start', self.hasClasses)
+		self.logPreempt = self.eventLog.emitter('preempt', self.hasClasses)
+		self.logCompletion = self.eventLog.emitter('completion', self.hasClasses)
+
+	# Wrap the methods of each phase for the profiler; undone in finishResults
+	def attachProfiler(self, profiler):
+		attachMachine(profiler, self)
+
+	# Put the end of the run and any injections in the calendar; the
+	# event loops schedule the first arrival
+	def startCalendar(self, simLength):
+		self.calendar.clear()
+		self.calendar.schedule(simLength, STOP)
+		for number, time in enumerate(self.injectionTimes, 1):
+			self.calendar.schedule(time, INJECTION, number)
+
+	# Called at each of injectionTimes with its number (1, 2, ...). The
+	# headless machines inject nothing; the catastrophic GUIs insert a
+	# large job here.
+	def injectionEvent(self, number, load, procDist, numClasses = None):
+		pass
+
+	# Called from the event loop every PROGRESS_CHECK_EVENTS arrivals. This
+	# counts events rather than simulated time, so a run that slows down
+	# in simulated time still reports about once per interval.
+	def sampleProgress(self):
+		self.progressCheck = self.ctr + PROGRESS_CHECK_EVENTS
+		self.progressMeter.sample(self.CurrentTime, self.ctr + self.numCompleted, self.Queue.Size)
+
+	# Returns (times, numJobs, avgNumJobs) as recorded by the trace policy
+	def traceArrays(self):
+		if self.trace is None:
+			return [], [], []
+		times, (numJobs, avgNumJobs) = self.trace.arrays()
+		return times, numJobs, avgNumJobs
+
+	# Flush buffered results; called on normal end, StopSim and exceptions
+	def finishResults(self):
+		if self.writer is not None:
+			self.writer.close()
+		self.eventLog.close()
+		if self.progressMeter is not None:
+			self.progressMeter.finish(self.CurrentTime, self.ctr + self.numCompleted, self.Queue.Size)
+		if self.profiler is not None:
+			self.profiler.stop()
+			self.profiler.detach()
+
+	def results(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax, simLength):
+		completed = max(self.numCompleted, 1)
+		results = {'scheduler' : self.scheduler,
+				'seed' : self.seed,
+				'load' : load,
+				'arrDist' : arrDist,
+				'procRate' : procRate,
+				'procDist' : procDist,
+				'alpha' : self.boundedPareto.alpha,
+				'lower' : self.boundedPareto.L,
+				'upper' : self.boundedPareto.U,
+				'percErrorMin' : percErrorMin,
+				'percErrorMax' : percErrorMax,
+				'simLength' : simLength,
+				'endTime' : self.CurrentTime,
+				'numArrivals' : self.ctr,
+				'numCompleted' : self.numCompleted,
+				'avgNumJobs' : self.AvgNumJobs,
+				'avgTimeSys' : self.sumTimeSys/completed,
+				'avgProcTime' : self.meanProcTime,
+				'varProcTime' : self.sumSqProcTime/completed,
+				'avgPercError' : self.sumPercError/completed
+				}
+		if self.batchMeans is not None:
+			results.update(self.batchResults())
+		if self.profiler is not None:
+			results['profile'] = self.profiler.rows()
+		return results
+
+	# Steady state number in system from the batch means, or nan while too
+	# few batches have closed for an interval
+	def batchResults(self):
+		estimate = self.batchMeans.estimate()
+		if estimate is None:
+			estimate = dict.fromkeys(('mean', 'halfWidth', 'low', 'high', 'warmUpTime', 'batchLength'), float('nan'))
+		return {'steadyNumJobs' : estimate['mean'],
+				'steadyNumJobsHalfWidth' : estimate['halfWidth'],
+				'steadyNumJobsLow' : estimate['low'],
+				'steadyNumJobsHigh' : estimate['high'],
+				'warmUpTime' : estimate['warmUpTime'],
+				'batchLength' : estimate['batchLength'],
+				'converged' : self.batchMeans.converged
+				}
+
+
+#----------------------------------------------------------------------#
+# Class: SRPTEMachine
+#
+# Jobs are serviced in order of shortest estimated remaining processing
+# time. MachineClass in SRPTE.py and SRPTE_Catastrophic.py runs this
+# machine from the GUI.
+#
+#----------------------------------------------------------------------#
+class SRPTEMachine(MachineBase):
+	scheduler = 'SRPTE'
+	resultsFolder = 'SRPT'
+	resultsPrefix = 'SRPT'
+
+	def __init__(self, scenario = Scenario(), output = OutputOptions(), analysis = AnalysisOptions(), rng = None):
+		MachineBase.__init__(self, scenario, output, analysis, rng)
+		self.TimeUntilArrival = 0.0
+
+	def makeQueue(self):
+		return ERPTHeapQueue()
+
+	# Job arriving
+	def arrivalEvent(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax):
+		J = self.newJob(self.ctr, load, procRate, procDist, percErrorMin, percErrorMax)
+
+		if self.logArrival is not None:
+			self.logArrival(self.CurrentTime, J)
+		self.calcNumJobs(self.ctr, load)
+
+		if(self.Queue.Size > 0):
+			self.updateJob()	# update data in queue
+		running = self.getProcessingJob() if (self.logPreempt is not None and self.ServerBusy) else None
+		self.Queue.insert(J)	# add job to queue
+		if running is not None and self.Queue.headJob is not running:
+			self.logPreempt(self.CurrentTime, running)
+		self.processJob()	# process first job in queue
+
+		# Generate next arrival
+		self.TimeUntilArrival = self.setArrivalDist(self.arrivalRate, arrDist)
+		self.ctr += 1
+
+	# Processing first job in queue
+	def processJob(self):
+		self.ServiceStartTime = self.CurrentTime
+		currentJob = self.getProcessingJob()
+		self.pendingCompletion = self.calendar.reschedule(self.pendingCompletion, self.CurrentTime + currentJob.RPT, COMPLETION)
+		if self.logStart is not None:
+			self.logStart(self.CurrentTime, currentJob)
+		self.ServerBusy = True
+
+	# Job completed
+	def completionEvent(self, load):
+		currentJob = self.getProcessingJob()
+		self.ServerBusy = False
+
+		self.JobOrderOut.append(currentJob.jobID)
+		self.calcNumJobs(self.ctr, load)
+		self.recordCompletion(currentJob)
+
+		if self.logCompletion is not None:
+			self.logCompletion(self.CurrentTime, currentJob)
+		self.Queue.removeHead() # remove job from queue
+
+	def run(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax, simLength):
+		self.prepareResults(load, simLength)
+		try:
+			self.eventLoop(load, arrDist, procRate, procDist, percErrorMin, percErrorMax, simLength)
+		finally:
+			self.finishResults()
+		return self.results(load, arrDist, procRate, procDist, percErrorMin, percErrorMax, simLength)
+
+	# SRPTE measures the time to the next arrival from the last event, so
+	# a completion moves the next arrival back by the time it took. The
+	# arrival is not in the calendar; it is due at CurrentTime +
+	# TimeUntilArrival, which is compared with the calendar's next event.
+	def eventLoop(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax, simLength):
+		calendar = self.calendar
+		self.startCalendar(simLength)
+		arrRate = float(load) / procRate
+		self.TimeUntilArrival = self.setArrivalDist(arrRate, arrDist) # time of first job arrival
+
+		while 1:
+			arrivalTime = self.CurrentTime + self.TimeUntilArrival
+			if calendar.before(arrivalTime, ARRIVAL):
+				self.CurrentTime = arrivalTime
+				self.arrivalEvent(load, arrDist, procRate, procDist, percErrorMin, percErrorMax)
+			else:
+				time, kind, sequence, data, pending = calendar.pop()
+				if kind == COMPLETION:
+					self.CurrentTime = time
+					self.pendingCompletion = None
+					self.completionEvent(load)
+
+					if(self.Queue.Size > 0):
+						self.processJob()
+				elif kind == INJECTION:
+					self.CurrentTime = time
+					self.injectionEvent(data, load, procDist)
+				elif kind == STOP:
+					self.StopSim = True		# the first event past simLength is the last
+					continue
+
+			if self.ctr >= self.progressCheck:
+				self.sampleProgress()
+
+			if (self.StopSim == True):
+				break
+
+
+#----------------------------------------------------------------------#
+# Class: ClassBasedMachine
+#
+# Arrivals are assigned to SRPT classes by comparing their ERPT with
+# the previous numClasses - 1 arrivals. MachineClass in the
+# ClassBased_SingleServer scripts runs this machine from the GUI.
+#
+#----------------------------------------------------------------------#
+class ClassBasedMachine(MachineBase):
+	scheduler = 'Class'
+	resultsFolder = 'Class'
+	resultsPrefix = 'Class'
+	hasClasses = True
+
+	def __init__(self, scenario = Scenario(), output = OutputOptions(), analysis = AnalysisOptions(), rng = None):
+		MachineBase.__init__(self, scenario, output, analysis, rng)
+		self.PreviousJobs = ERPTWindow()		# last numClasses - 1 arrivals
+		self.NextArrival = 0.0
+		self.ServiceFinishTime = 0
+		self.JobInService = None
+
+		self.classAverage = ClassTimeAverage()		# area under the number in each class
+
+	def makeQueue(self):
+		return ClassBucketQueue()
+
+	# The job in service may be one of the previous arrivals the window
+	# ranks against, so keep its sorted ERPT current
+	def updateJob(self):
+		MachineBase.updateJob(self)
+		self.PreviousJobs.update(self.getProcessingJob())
+
+	# Give arriving job a class and add it to the queue. The class is the
+	# rank of its ERPT among the previous numClasses - 1 arrivals (ties
+	# rank after the earlier jobs), found by binary search in the window.
+	def assignClass(self, numClasses, job, prevJobs, counterStart, counter):
+		job.priorityClass = counterStart + counter*(prevJobs.rank(job.ERPT) + 1)
+
+		# Add job to the bucket for its class
+		self.Queue.insert(job)
+		self.classAverage.change(job.priorityClass, 1)
+
+		# Regardless of class, add job to the window of previous jobs
+		prevJobs.push(job)
+
+	# Time average number of jobs in each class up to now
+	@property
+	def AvgNumJobsArray(self):
+		return self.classAverage.means(self.CurrentTime)
+
+	# Class counts, like the number in system, are counted from the event
+	# after the one that changed them. Only the classes that changed are
+	# integrated, so this is O(1) per event whatever numClasses is.
+	def calcNumJobsPerClass(self):
+		self.classAverage.record(self.CurrentTime)
+
+	# Job arriving
+	def arrivalEvent(self, load, arrDist, procRate, procDist, numClasses, percErrorMin, percErrorMax):
+		J = self.newJob(self.ctr, load, procRate, procDist, percErrorMin, percErrorMax)
+		self.ctr += 1
+		if self.logArrival is not None:
+			self.logArrival(self.CurrentTime, J)
+
+		self.calcNumJobs(self.ctr, load)
+		self.calcNumJobsPerClass()
+
+		if(self.Queue.Size > 0):
+			self.updateJob()	# update data in queue
+		self.assignClass(numClasses, J, self.PreviousJobs, 0, 1)			# give job a class, and add to queue
+		if self.logClass is not None:
+			self.logClass(self.CurrentTime, J)
+		if self.logPreempt is not None and self.ServerBusy and self.Queue.headJob is not self.JobInService:
+			self.logPreempt(self.CurrentTime, self.JobInService)
+		self.processJob()						# process first job in queue
+
+		self.NextArrival = self.CurrentTime + self.setArrivalDist(self.arrivalRate, arrDist) # generate next arrival
+
+	# Processing first job in queue
+	def processJob(self):
+		self.ServiceStartTime = self.CurrentTime
+		self.JobInService = self.getProcessingJob()
+		self.ServiceFinishTime = self.CurrentTime + self.JobInService.RPT
+		self.pendingCompletion = self.calendar.reschedule(self.pendingCompletion, self.ServiceFinishTime, COMPLETION)
+		if self.logStart is not None:
+			self.logStart(self.CurrentTime, self.JobInService)
+		self.ServerBusy = True
+
+	# Job completed
+	def completionEvent(self, numClasses, load):
+		self.JobOrderOut.append(self.JobInService.jobID)
+
+		self.calcNumJobs(self.ctr, load)
+		self.calcNumJobsPerClass()
+		self.recordCompletion(self.JobInService)
+
+		if self.logCompletion is not None:
+			self.logCompletion(self.CurrentTime, self.JobInService)
+		self.ServerBusy = False
+		self.classAverage.change(self.JobInService.priorityClass, -1)
+		self.JobInService = None
+
+		self.Queue.removeHead()		 # remove job from queue
+
+	def run(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax, numClasses, simLength):
+		self.prepareResults(load, simLength)
+		self.Queue.clear(numClasses)
+		self.PreviousJobs.clear(numClasses - 1)
+		self.classAverage.clear(numClasses)
+		try:
+			self.eventLoop(load, arrDist, procRate, procDist, percErrorMin, percErrorMax, numClasses, simLength)
+		finally:
+			self.finishResults()
+
+		results = self.results(load, arrDist, procRate, procDist, percErrorMin, percErrorMax, simLength)
+		results['numClasses'] = numClasses
+		results['avgNumJobsPerClass'] = self.AvgNumJobsArray
+		return results
+
+	# The next arrival is not in the calendar; NextArrival is compared
+	# with the calendar's next event
+	def eventLoop(self, load, arrDist, procRate, procDist, percErrorMin, percErrorMax, numClasses, simLength):
+		calendar = self.calendar
+		self.startCalendar(simLength)
+		arrRate = float(load) / procRate
+		self.NextArrival = self.CurrentTime + self.setArrivalDist(arrRate, arrDist)		# time of first job arrival
+
+		while 1:
+			if calendar.before(self.NextArrival, ARRIVAL):
+				self.CurrentTime = self.NextArrival
+				self.arrivalEvent(load, arrDist, procRate, procDist, numClasses, percErrorMin, percErrorMax)
+			else:
+				time, kind, sequence, data, pending = calendar.pop()
+				if kind == COMPLETION:
+					self.CurrentTime = time
+					self.pendingCompletion = None
+					self.completionEvent(numClasses, load)
+
+					if(self.Queue.Size > 0):
+						self.processJob()
+				elif kind == INJECTION:
+					self.CurrentTime = time
+					self.injectionEvent(data, load, procDist, numClasses)
+				elif kind == STOP:
+					self.StopSim = True		# the first event past simLength is the last
+					continue
+
+			if self.ctr >= self.progressCheck:
+				self.sampleProgress()
+
+			if (self.StopSim == True):
+				break
+
+
+#----------------------------------------------------------------------#
+# Function: runSimulation
+#
+# Plain Python entry point. Builds the machine for the scenario (see
+# SimParams), runs it and returns a dictionary of results.
+#
+#----------------------------------------------------------------------#
+def runSimulation(scenario = Scenario(), output = OutputOptions(), analysis = AnalysisOptions()):
+	S = scenario
+	if S.scheduler not in SCHEDULERS:
+		raise ValueError("Unknown scheduler %r, expected one of %s"%(S.scheduler, ', '.join(SCHEDULERS)))
+	if S.procDist not in DISTRIBUTIONS:
+		raise ValueError("Unknown processing distribution %r"%S.procDist)
+	if S.procDist == 'Custom':
+		compileEquation(S.customEquation)		# reject a bad equation before the run starts
+	if S.load <= 0.0:
+		raise ValueError("System load must be a non-zero value!")
+	if S.simLength <= 0.0:
+		raise ValueError("Simulation length must be a non-zero value!")
+
+	if S.scheduler == 'SRPTE':
+		MC = SRPTEMachine(S, output, analysis)
+		return MC.run(S.load, S.arrDist, S.procRate, S.procDist, S.percErrorMin, S.percErrorMax, S.simLength)
+	else:
+		if S.numClasses < 1:
+			raise ValueError("Number of classes must be at least 1!")
+		MC = ClassBasedMachine(S, output, analysis)
+		return MC.run(S.load, S.arrDist, S.procRate, S.procDist, S.percErrorMin, S.percErrorMax, S.numClasses, S.simLength)
+
+
+def parseArgs(argv):
+	parser = argparse.ArgumentParser(description="Run a single server simulation without the GUI.")
+	parser.add_argument('--scheduler', choices=SCHEDULERS, default='SRPTE')
+	parser.add_argument('--load', type=float, default=0.95)
+	parser.add_argument('--arrDist', choices=('Poisson', 'Exponential'), default='Exponential')
+	parser.add_argument('--procRate', type=float, default=0.5)
+	parser.add_argument('--procDist', choices=DISTRIBUTIONS, default='Bounded Pareto')
+	parser.add_argument('--percErrorMin', type=float, default=0.0)
+	parser.add_argument('--percErrorMax', type=float, default=0.0)
+	parser.add_argument('--numClasses', type=int, default=10)
+	parser.add_argument('--simLength', type=float, default=5000000.0)
+	parser.add_argument('--alpha', type=float, default=1.5)
+	parser.add_argument('--lower', type=float, default=1)
+	parser.add_argument('--upper', type=float, default=10**6)
+	parser.add_argument('--customEquation', default="-log(1 - random.uniform(0.0, 1.0))/procRate",
+						help="inverse CDF in terms of x (or random.uniform(0.0, 1.0)), procRate, log, exp and sqrt")
+	parser.add_argument('--seed', type=int, default=SEED)
+	parser.add_argument('--variates', choices=VARIATE_MODES, default='block', help=VARIATES_HELP)
+	parser.add_argument('--blockSize', type=int, default=DEFAULT_BLOCK_SIZE)
+	parser.add_argument('--save', dest='saveResults', action='store_true', help="write the Num/Avg results files")
+	parser.add_argument('--resultsDir', default="./SINGLE_SERVER_RESULTS")
+	parser.add_argument('--format', dest='resultsFormat', choices=RESULTS_FORMATS, default='text', help="text rows or binary float64 .npy columns")
+	parser.add_argument('--flushSize', type=int, default=10000, help="rows buffered per results file before writing")
+	parser.add_argument('--tracePolicy', choices=TRACE_POLICIES, default='minmax', help="how NumJobs/AvgNumJobs are kept in memory (all keeps every event, uncapped)")
+	parser.add_argument('--traceEvery', type=int, default=1, help="keep every k-th event (tracePolicy every)")
+	parser.add_argument('--traceInterval', type=float, default=None, help="grid step or bucket width (tracePolicy grid/minmax)")
+	parser.add_argument('--traceMaxPoints', type=int, default=10000, help="cap on samples kept in memory (ignored by tracePolicy all)")
+	parser.add_argument('--batchMeans', action='store_true', help="estimate the steady state number in system by batch means")
+	parser.add_argument('--batchLength', type=float, default=100.0, help="initial batch length, doubled as batches merge")
+	parser.add_argument('--numBatches', type=int, default=20, help="batches the confidence interval is computed from")
+	parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+	parser.add_argument('--targetHalfWidth', type=float, default=None, help="stop once the steady state half width is below this")
+	parser.add_argument('--targetPrecision', type=float, default=None, help="stop once half width / mean is below this")
+	parser.add_argument('--verbose', action='store_true', help="print the event log")
+	parser.add_argument('--logLevel', choices=LOG_LEVELS, default=None, help="events to log (default: debug with --verbose or --logFile, else off)")
+	parser.add_argument('--logFile', default=None, help="write the event log as CSV to this path")
+	parser.add_argument('--progress', action='store_true', help="report progress and throughput on stderr while running")
+	parser.add_argument('--progressInterval', type=float, default=PROGRESS_INTERVAL, help="wall seconds between progress reports")
+	parser.add_argument('--profile', action='store_true', help="time each phase of the event loop and print a table at the end")
+	return parser.parse_args(argv)
+
+
+def printProgress(report):
+	sys.stderr.write(formatProgress(report) + "\n")
+	sys.stderr.flush()
+
+
+#----------------------------------------------------------------------#
+def main(argv = None):
+	values = vars(parseArgs(argv))
+	values['console'] = print if values.pop('verbose') else None
+	values['progress'] = printProgress if values['progress'] else None
+	results = runSimulation(*makeParams(**values))
+	profile = results.pop('profile', None)
+	for key in results:
+		print ("%s = %s"%(key, results[key]))
+	if profile is not None:
+		print (formatProfile(profile))
+	return 0
+
+
+if __name__ == '__main__': sys.exit(main())
@@ -0,0 +1,56 @@
+#----------------------------------------------------------------------#
+# SimParams.py
+#
+# Parameter records of a headless simulation. A Scenario says what is
+# simulated (scheduler, load, size distribution, run length and random
+# stream), OutputOptions what the run writes and reports along the way,
+# and AnalysisOptions how the steady state number in system is
+# estimated. Each field defaults to the value SimEngine always used.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from collections import namedtuple
+
+from OutputAnalysis import DEFAULT_CONFIDENCE
+from Progress import PROGRESS_INTERVAL
+from VariateStreams import DEFAULT_BLOCK_SIZE
+
+SEED = 994863731
+
+# variates is one of VARIATE_MODES; 'block', the faster default, draws
+# a different stream for the same seed than the GUIs (see VARIATES_HELP)
+Scenario = namedtuple('Scenario', ('scheduler', 'load', 'arrDist', 'procRate', 'procDist', 'percErrorMin', 'percErrorMax',
+								'numClasses', 'simLength', 'seed', 'alpha', 'lower', 'upper', 'customEquation',
+								'variates', 'blockSize'),
+					defaults = ('SRPTE', 0.95, 'Exponential', 0.5, 'Bounded Pareto', 0, 0,
+								10, 5000000.0, SEED, 1.5, 1, 10**6, "-log(1 - random.uniform(0.0, 1.0))/procRate",
+								'block', DEFAULT_BLOCK_SIZE))
+
+# console and progress are callables taking a line of text and a
+# ProgressReport; logLevel None logs every event when console or
+# logFile is given, and nothing otherwise
+OutputOptions = namedtuple('OutputOptions', ('saveResults', 'resultsDir', 'resultsFormat', 'flushSize',
+											'tracePolicy', 'traceEvery', 'traceInterval', 'traceMaxPoints',
+											'console', 'logFile', 'logLevel', 'progress', 'progressInterval', 'profile'),
+						defaults = (False, "./SINGLE_SERVER_RESULTS", 'text', 10000,
+									'minmax', 1, None, 10000,
+									None, None, None, None, PROGRESS_INTERVAL, False))
+
+# Batch means are kept when batchMeans is set or either target is
+# given; a target stops the run as soon as it is met
+AnalysisOptions = namedtuple('AnalysisOptions', ('batchMeans', 'batchLength', 'maxBatches', 'numBatches', 'confidence',
+												'targetHalfWidth', 'targetPrecision'),
+							defaults = (False, 100.0, 1024, 20, DEFAULT_CONFIDENCE, None, None))
+
+
+# Splits keyword values by name into (Scenario, OutputOptions,
+# AnalysisOptions), for callers holding one flat dict of settings such
+# as a sweep point or parsed command line
+def makeParams(**values):
+	records = []
+	for Record in (Scenario, OutputOptions, AnalysisOptions):
+		records.append(Record(**dict((name, values.pop(name)) for name in Record._fields if name in values)))
+	if values:
+		raise TypeError("Unknown simulation parameter(s) %s"%', '.join(sorted(values)))
+	return tuple(records)
@@ -0,0 +1,237 @@
+#----------------------------------------------------------------------#
+# TraceRecorder.py
+#
+# In-memory recording policies for the number-in-system time series
+# (NumJobsTime, NumJobs and AvgNumJobs). Recording every event makes
+# memory grow with the length of the run; the recorders here keep
+# every event, every k-th event, values on a fixed time grid, or the
+# min/max of each time bucket. All but 'all' can be capped at maxPoints
+# samples. When a cap is hit the recorder halves its resolution (k, grid
+# step or bucket width doubles) so memory stays bounded however long the
+# run.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+TRACE_POLICIES = ('none', 'all', 'every', 'grid', 'minmax')
+
+
+#----------------------------------------------------------------------#
+# Class: NoTrace
+#
+# Records nothing. Used for batch runs that only want the averages.
+#
+#----------------------------------------------------------------------#
+class NoTrace(object):
+	def __init__(self, numColumns = 2):
+		self.numColumns = numColumns
+
+	def record(self, time, *values):
+		pass
+
+	def clear(self):
+		pass
+
+	# Returns (times, [column, ...]) as lists
+	def arrays(self):
+		return [], [[] for i in range(self.numColumns)]
+
+
+#----------------------------------------------------------------------#
+# Class: EventTrace
+#
+# Keeps every k-th event (k = every). With maxPoints set, every other
+# sample is dropped and k doubled whenever the cap is exceeded.
+#
+#----------------------------------------------------------------------#
+class EventTrace(NoTrace):
+	def __init__(self, numColumns = 2, every = 1, maxPoints = None):
+		NoTrace.__init__(self, numColumns)
+		if every < 1:
+			raise ValueError("Trace must keep at least every event!")
+		if maxPoints is not None and maxPoints < 2:
+			raise ValueError("Trace must keep at least 2 points!")
+		self.initialEvery = every
+		self.maxPoints = maxPoints
+		self.clear()
+
+	def clear(self):
+		self.every = self.initialEvery
+		self.count = 0
+		self.times = []
+		self.columns = [[] for i in range(self.numColumns)]
+
+	def record(self, time, *values):
+		if self.count % self.every == 0:
+			self.times.append(time)
+			for column, value in zip(self.columns, values):
+				column.append(value)
+			if self.maxPoints is not None and len(self.times) > self.maxPoints:
+				self.thin()
+		self.count += 1
+
+	# Drops every other sample, starting from list position first
+	def thin(self, first = 1):
+		del self.times[first::2]
+		for column in self.columns:
+			del column[first::2]
+		self.every *= 2
+
+	def arrays(self):
+		return self.times, self.columns
+
+
+#----------------------------------------------------------------------#
+# Class: GridTrace
+#
+# Samples the step function on a fixed time grid (0, interval,
+# 2*interval, ...). Each grid point gets the last value recorded
+# at or before it. With maxPoints set the grid step doubles whenever
+# the cap is exceeded.
+#
+#----------------------------------------------------------------------#
+class GridTrace(EventTrace):
+	def __init__(self, numColumns = 2, interval = 1.0, maxPoints = None):
+		if interval <= 0:
+			raise ValueError("Trace interval must be positive!")
+		self.initialInterval = interval
+		EventTrace.__init__(self, numColumns, 1, maxPoints)
+
+	def clear(self):
+		EventTrace.clear(self)
+		self.interval = self.initialInterval
+		self.nextIndex = 0			# next grid point is nextIndex*interval
+		self.lastValues = None
+
+	def record(self, time, *values):
+		if self.lastValues is None:
+			self.nextIndex = int(-(-time // self.interval))		# first grid point at or after the first sample
+		else:
+			while self.nextIndex*self.interval < time:
+				self.times.append(self.nextIndex*self.interval)
+				for column, value in zip(self.columns, self.lastValues):
+					column.append(value)
+				self.nextIndex += 1
+				if self.maxPoints is not None and len(self.times) > self.maxPoints:
+					self.thin()
+		self.lastValues = values
+
+	def thin(self):
+		# Keep the points on even grid indices, which are the points of the
+		# coarser grid. The first point kept is at index nextIndex - len(times).
+		firstIndex = self.nextIndex - len(self.times)
+		EventTrace.thin(self, 1 - firstIndex % 2)
+		self.nextIndex = (self.nextIndex + 1)//2
+		self.interval *= 2
+
+
+#----------------------------------------------------------------------#
+# Class: MinMaxTrace
+#
+# Splits time into buckets of width interval and keeps, per bucket,
+# the samples with the smallest and largest first column (in time
+# order). Plots drawn from it keep every peak and trough of the full
+# trace. With maxPoints set, neighbouring buckets are merged and the
+# width doubled whenever the cap is exceeded.
+#
+#----------------------------------------------------------------------#
+class MinMaxTrace(NoTrace):
+	def __init__(self, numColumns = 2, interval = 1.0, maxPoints = None):
+		NoTrace.__init__(self, numColumns)
+		if interval <= 0:
+			raise ValueError("Trace interval must be positive!")
+		if maxPoints is not None and maxPoints < 2:
+			raise ValueError("Trace must keep at least 2 points!")
+		self.initialInterval = interval
+		self.maxPoints = maxPoints
+		self.clear()
+
+	def clear(self):
+		self.interval = self.initialInterval
+		self.buckets = []			# [bucket index, min sample, max sample]
+		self.current = None
+
+	def record(self, time, *values):
+		sample = (time,) + values
+		index = int(time // self.interval)
+		current = self.current
+		if current is not None and current[0] == index:
+			self.addToBucket(current, sample)
+			return
+
+		if current is not None:
+			self.buckets.append(current)
+			if self.maxPoints is not None and 2*(len(self.buckets) + 1) > self.maxPoints:
+				self.merge()
+				index = int(time // self.interval)
+
+		if self.buckets and self.buckets[-1][0] == index:
+			# After a merge the new sample can land in the last bucket
+			self.current = self.buckets.pop()
+			self.addToBucket(self.current, sample)
+		else:
+			self.current = [index, sample, sample]
+
+	def addToBucket(self, bucket, sample):
+		if sample[1] < bucket[1][1]:
+			bucket[1] = sample
+		elif sample[1] > bucket[2][1]:
+			bucket[2] = sample
+
+	# Merge neighbouring buckets and double the bucket width
+	def merge(self):
+		merged = []
+		for bucket in self.buckets:
+			index = bucket[0]//2
+			if merged and merged[-1][0] == index:
+				last = merged[-1]
+				if bucket[1][1] < last[1][1]:
+					last[1] = bucket[1]
+				if bucket[2][1] > last[2][1]:
+					last[2] = bucket[2]
+			else:
+				merged.append([index, bucket[1], bucket[2]])
+		self.buckets = merged
+		self.interval *= 2
+
+	def arrays(self):
+		times = []
+		columns = [[] for i in range(self.numColumns)]
+		buckets = self.buckets + ([self.current] if self.current is not None else [])
+		for bucket in buckets:
+			samples = sorted(set([bucket[1], bucket[2]]))
+			for sample in samples:
+				times.append(sample[0])
+				for column, value in zip(columns, sample[1:]):
+					column.append(value)
+		return times, columns
+
+
+#----------------------------------------------------------------------#
+# Function: makeTraceRecorder
+#
+# Builds the recorder for a policy name. 'all' keeps every event and
+# ignores maxPoints. For 'grid' and 'minmax' without an explicit
+# interval, simLength is split into maxPoints (grid) or maxPoints/2
+# (minmax) steps.
+#
+#----------------------------------------------------------------------#
+def makeTraceRecorder(policy = 'all', numColumns = 2, every = 1, interval = None, maxPoints = None, simLength = None):
+	if policy not in TRACE_POLICIES:
+		raise ValueError("Unknown trace policy %r, expected one of %s"%(policy, ', '.join(TRACE_POLICIES)))
+	if policy in ('grid', 'minmax') and interval is None:
+		if simLength is None or maxPoints is None:
+			raise ValueError("A %s trace needs an interval, or a simLength and maxPoints"%policy)
+		steps = maxPoints if policy == 'grid' else max(maxPoints//2, 1)
+		interval = float(simLength)/steps
+
+	if policy == 'none':
+		return NoTrace(numColumns)
+	elif policy == 'all':
+		return EventTrace(numColumns)
+	elif policy == 'every':
+		return EventTrace(numColumns, every, maxPoints)
+	elif policy == 'grid':
+		return GridTrace(numColumns, interval, maxPoints)
+	else:
+		return MinMaxTrace(numColumns, interval, maxPoints)
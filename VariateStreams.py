@@ -0,0 +1,376 @@
+#----------------------------------------------------------------------#
+# VariateStreams.py
+#
+# Random variate sources for the simulators. Distributions are looked
+# up by name in a registry of sampler classes once per run; after that
+# every sample costs exactly one draw. RandomVariates draws one value
+# at a time through random.Random. BlockVariates pre-generates
+# interarrival times, job sizes and percent errors in blocks (64k
+# values by default) and hands them out one at a time, using NumPy
+# when it is installed. Custom inverse CDFs are compiled once into a
+# restricted function of the uniform variate instead of eval'd per job.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import ast
+from collections import namedtuple
+import math
+import random
+
+try:
+	import numpy
+except ImportError:
+	numpy = None
+
+VARIATE_MODES = ('random', 'block')
+# Help of the --variates option, shared by the command line tools
+VARIATES_HELP = ("block (default) draws pre-generated blocks and gives a different stream from the GUI for the same seed; "
+				"random draws one at a time and matches the GUI")
+DEFAULT_BLOCK_SIZE = 65536
+
+
+EQUATION_FUNCTIONS = {'log': math.log, 'exp': math.exp, 'sqrt': math.sqrt}
+EQUATION_CONSTANTS = {'pi': math.pi, 'e': math.e}
+NUMPY_FUNCTIONS = {'log': numpy.log, 'exp': numpy.exp, 'sqrt': numpy.sqrt} if numpy is not None else None
+
+EQUATION_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+
+
+#----------------------------------------------------------------------#
+# Class: EquationCompiler
+#
+# Checks the syntax tree of a custom inverse CDF and rewrites it in
+# terms of the uniform variate x. Only numbers, procRate, x, pi, e, the
+# arithmetic operators and log/exp/sqrt are accepted. The uniform draws
+# random.uniform(a, b) (with constant bounds) and random.random() all
+# become the one variate x, so each sample costs a single draw and the
+# expression can be applied to a whole array of uniforms at once.
+#
+#----------------------------------------------------------------------#
+class EquationCompiler(ast.NodeTransformer):
+	def generic_visit(self, node):
+		if isinstance(node, (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Load) + EQUATION_OPERATORS):
+			return ast.NodeTransformer.generic_visit(self, node)
+		raise ValueError("%s is not allowed in a custom distribution"%type(node).__name__)
+
+	def visit_Constant(self, node):
+		if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+			raise ValueError("Only numbers are allowed as constants, not %r"%(node.value,))
+		return node
+
+	def visit_Name(self, node):
+		if node.id in ('x', 'procRate'):
+			return node
+		if node.id in EQUATION_CONSTANTS:
+			return ast.copy_location(ast.Constant(EQUATION_CONSTANTS[node.id]), node)
+		raise ValueError("Unknown name %r in custom distribution"%node.id)
+
+	def visit_Call(self, node):
+		if node.keywords:
+			raise ValueError("Keyword arguments are not allowed in a custom distribution")
+		function = node.func
+		if isinstance(function, ast.Name) and function.id in EQUATION_FUNCTIONS:
+			if len(node.args) != 1:
+				raise ValueError("%s takes exactly one argument"%function.id)
+			node.args = [self.visit(node.args[0])]
+			return node
+		if isinstance(function, ast.Attribute) and isinstance(function.value, ast.Name) and function.value.id == 'random':
+			if function.attr == 'random' and not node.args:
+				return ast.copy_location(ast.Name('x', ast.Load()), node)
+			if function.attr == 'uniform' and len(node.args) == 2:
+				a, b = [constantValue(arg) for arg in node.args]
+				uniform = ast.parse("%r + %r*x"%(a, b - a), mode='eval').body
+				return ast.copy_location(uniform, node)
+		raise ValueError("Unsupported call %s() in custom distribution"%ast.unparse(function))
+
+
+def constantValue(node):
+	try:
+		return float(ast.literal_eval(node))
+	except ValueError:
+		raise ValueError("random.uniform bounds must be numbers")
+
+
+#----------------------------------------------------------------------#
+# Function: compileEquation
+#
+# Compiles a custom inverse CDF (as built by CustomDist.convertFunction)
+# once into a function f(x, procRate) of the uniform variate x. With
+# functions = NUMPY_FUNCTIONS, x can be a NumPy array of uniforms.
+# Raises ValueError if the equation uses anything but arithmetic.
+#
+#----------------------------------------------------------------------#
+def compileEquation(equation, functions = EQUATION_FUNCTIONS):
+	try:
+		tree = ast.parse(equation.strip(), mode='eval')
+	except SyntaxError as error:
+		raise ValueError("Custom distribution %r is not a valid expression: %s"%(equation, error.msg))
+	body = EquationCompiler().visit(tree).body
+	arguments = ast.arguments(posonlyargs=[], args=[ast.arg('x'), ast.arg('procRate')], kwonlyargs=[],
+							kw_defaults=[], defaults=[])
+	tree = ast.fix_missing_locations(ast.Expression(ast.Lambda(arguments, body)))
+	namespace = dict(functions)
+	namespace['__builtins__'] = {}
+	return eval(compile(tree, '<custom distribution>', 'eval'), namespace)
+
+
+#----------------------------------------------------------------------#
+# Class: BoundedPareto
+#
+# Immutable Bounded Pareto parameters, built once per run and shared by
+# the jobs and the size sampler. Holds the mean and service rate used
+# by setArrProcRates, and the inverse CDF written as
+# (a - b*x)**exponent with a = L**-alpha and b = L**-alpha - U**-alpha.
+# When the mean is infinite (alpha <= 1) the service rate is 0.
+#
+#----------------------------------------------------------------------#
+class BoundedPareto(namedtuple('BoundedPareto', 'alpha L U mean processRate a b exponent')):
+	__slots__ = ()
+
+	def __new__(cls, alpha, L, U):
+		alpha, L, U = float(alpha), float(L), float(U)
+		if alpha <= 0 or L <= 0 or U <= L:
+			raise ValueError("Bounded Pareto needs alpha > 0 and 0 < L < U!")
+		if alpha > 1:
+			mean = (L**alpha/(1 - (L/U)**alpha))*(alpha/(alpha - 1))*((1/(L**(alpha - 1)))-(1/(U**(alpha - 1))))
+			processRate = 1/mean
+		else:
+			mean = float('inf')
+			processRate = 0.0
+		a = L**-alpha
+		b = a - U**-alpha
+		return super(BoundedPareto, cls).__new__(cls, alpha, L, U, mean, processRate, a, b, -1/alpha)
+
+	def arrivalRate(self, load):
+		return float(load) * self.processRate
+
+	# x may be a float or a NumPy array of uniforms
+	def inverseCDF(self, x):
+		return (self.a - self.b*x)**self.exponent
+
+
+#----------------------------------------------------------------------#
+# Class: Sampler
+#
+# Base class for the distribution samplers. A sampler is built once per
+# run with its parameters and a random source (random.Random or the
+# random module); sample() then returns one value using one draw.
+# sampleBlock() returns n values as a NumPy array from a NumPy
+# Generator, for the block streams.
+#
+#----------------------------------------------------------------------#
+class Sampler(object):
+	def __init__(self, rate, rng = random, boundedPareto = None, customEquation = None):
+		self.rate = rate
+		self.rng = rng
+
+	def sample(self):
+		raise NotImplementedError
+
+	def sampleBlock(self, generator, n):
+		raise NotImplementedError
+
+	# Plain Python block, used when NumPy is not installed
+	def sampleList(self, n):
+		sample = self.sample
+		return [sample() for i in range(n)]
+
+
+# Exponential with mean 1/rate
+class ExponentialSampler(Sampler):
+	def sample(self):
+		return self.rng.expovariate(self.rate)
+
+	def sampleBlock(self, generator, n):
+		return generator.standard_exponential(n)/self.rate
+
+
+# Exponential with mean rate (the 'Poisson' option in the GUI)
+class PoissonSampler(Sampler):
+	def __init__(self, rate, rng = random, boundedPareto = None, customEquation = None):
+		Sampler.__init__(self, rate, rng)
+		self.inverseRate = 1.0/rate
+
+	def sample(self):
+		return self.rng.expovariate(self.inverseRate)
+
+	def sampleBlock(self, generator, n):
+		return generator.standard_exponential(n)*self.rate
+
+
+# Uniform on [0, rate]
+class UniformSampler(Sampler):
+	def sample(self):
+		return self.rng.uniform(0.0, self.rate)
+
+	def sampleBlock(self, generator, n):
+		return generator.uniform(0.0, self.rate, n)
+
+
+# Bounded Pareto, by inverse CDF from a shared BoundedPareto
+class BoundedParetoSampler(Sampler):
+	def __init__(self, rate, rng = random, boundedPareto = None, customEquation = None):
+		Sampler.__init__(self, rate, rng)
+		self.inverseCDF = boundedPareto.inverseCDF
+
+	def sample(self):
+		return self.inverseCDF(self.rng.random())
+
+	def sampleBlock(self, generator, n):
+		return self.inverseCDF(generator.random(n))
+
+
+# Inverse CDF typed in by the user, compiled once by compileEquation
+class CustomSampler(Sampler):
+	def __init__(self, rate, rng = random, boundedPareto = None, customEquation = None):
+		Sampler.__init__(self, rate, rng)
+		self.customEquation = customEquation
+		self.function = compileEquation(customEquation)
+		if numpy is not None:
+			self.vectorFunction = compileEquation(customEquation, NUMPY_FUNCTIONS)
+
+	def sample(self):
+		return self.function(self.rng.random(), self.rate)
+
+	def sampleBlock(self, generator, n):
+		values = self.vectorFunction(generator.random(n), self.rate)
+		return numpy.broadcast_to(numpy.asarray(values, dtype=float), (n,))
+
+
+SERVICE_SAMPLERS = {
+	'Poisson': PoissonSampler,
+	'Exponential': ExponentialSampler,
+	'Uniform': UniformSampler,
+	'Bounded Pareto': BoundedParetoSampler,
+	'Custom': CustomSampler
+}
+
+ARRIVAL_SAMPLERS = {
+	'Poisson': PoissonSampler,
+	'Exponential': ExponentialSampler
+}
+
+
+def makeSampler(registry, name, rate, rng = random, boundedPareto = None, customEquation = None):
+	if name not in registry:
+		raise ValueError("Unknown distribution %r, expected one of %s"%(name, ', '.join(registry)))
+	return registry[name](rate, rng, boundedPareto, customEquation)
+
+
+#----------------------------------------------------------------------#
+# Class: RandomVariates
+#
+# This class draws every variate on demand from a single seeded
+# random.Random, or from rng when one is given (a GUI window passes the
+# stream its runs share). Samplers are resolved the first time a
+# distribution and rate are used and reused for the rest of the run.
+#
+#----------------------------------------------------------------------#
+class RandomVariates(object):
+	def __init__(self, seed, boundedPareto, customEquation, rng = None):
+		self.rng = rng if rng is not None else random.Random(seed)
+		self.boundedPareto = boundedPareto
+		self.customEquation = customEquation
+		self.samplers = {}		# (registry name, distribution, rate) -> sampler
+
+	def resolve(self, registry, kind, name, rate):
+		sampler = self.samplers.get((kind, name, rate))
+		if sampler is None:
+			sampler = makeSampler(registry, name, rate, self.rng, self.boundedPareto, self.customEquation)
+			self.samplers[(kind, name, rate)] = sampler
+		return sampler
+
+	def interarrival(self, arrRate, arrDist):
+		return self.resolve(ARRIVAL_SAMPLERS, 'arrival', arrDist, arrRate).sample()
+
+	def serviceTime(self, procRate, procDist):
+		return self.resolve(SERVICE_SAMPLERS, 'service', procDist, procRate).sample()
+
+	# Generates a percent error for processing time
+	def percentError(self, percErrorMin, percErrorMax):
+		return self.rng.uniform(percErrorMin, percErrorMax)
+
+
+#----------------------------------------------------------------------#
+# Class: VariateStream
+#
+# Hands out the values of a block generator one at a time, asking for
+# a new block of blockSize values when the current one runs out.
+#
+#----------------------------------------------------------------------#
+class VariateStream(object):
+	def __init__(self, generateBlock, blockSize = DEFAULT_BLOCK_SIZE):
+		if blockSize < 1:
+			raise ValueError("Block size must be at least 1!")
+		self.generateBlock = generateBlock
+		self.blockSize = blockSize
+		self.nextValue = iter(()).__next__
+
+	def next(self):
+		try:
+			return self.nextValue()
+		except StopIteration:
+			self.nextValue = iter(self.generateBlock(self.blockSize)).__next__
+			return self.nextValue()
+
+
+#----------------------------------------------------------------------#
+# Class: BlockVariates
+#
+# This class serves interarrival times, job sizes and percent errors
+# from three independent block streams seeded from one run seed.
+# Interarrival times and percent errors are kept as standard
+# exponential and uniform values and scaled on the way out, so a
+# stream does not depend on the rate it is used with.
+#
+#----------------------------------------------------------------------#
+class BlockVariates(object):
+	def __init__(self, seed, boundedPareto, customEquation, blockSize = DEFAULT_BLOCK_SIZE):
+		self.boundedPareto = boundedPareto
+		self.customEquation = customEquation
+		self.blockSize = blockSize
+
+		if numpy is not None:
+			self.generators = [numpy.random.default_rng(child) for child in numpy.random.SeedSequence(seed).spawn(3)]
+			arrivalBlock = lambda n: self.generators[0].standard_exponential(n).tolist()
+			errorBlock = lambda n: self.generators[2].random(n).tolist()
+		else:
+			self.generators = [random.Random("%s-%d"%(seed, i)) for i in range(3)]
+			arrivalBlock = lambda n: [self.generators[0].expovariate(1.0) for i in range(n)]
+			errorBlock = lambda n: [self.generators[2].random() for i in range(n)]
+
+		self.arrivals = VariateStream(arrivalBlock, blockSize)
+		self.errors = VariateStream(errorBlock, blockSize)
+		self.sizes = {}			# (procDist, procRate) -> job size stream
+
+	def interarrival(self, arrRate, arrDist):
+		if arrDist == 'Poisson':
+			return self.arrivals.next()*arrRate
+		return self.arrivals.next()/arrRate
+
+	def serviceTime(self, procRate, procDist):
+		stream = self.sizes.get((procDist, procRate))
+		if stream is None:
+			stream = VariateStream(self.sizeBlock(procRate, procDist), self.blockSize)
+			self.sizes[(procDist, procRate)] = stream
+		return stream.next()
+
+	def percentError(self, percErrorMin, percErrorMax):
+		return percErrorMin + (percErrorMax - percErrorMin)*self.errors.next()
+
+	# Returns a function generating n job sizes for the distribution
+	def sizeBlock(self, procRate, procDist):
+		generator = self.generators[1]
+		sampler = makeSampler(SERVICE_SAMPLERS, procDist, procRate, generator, self.boundedPareto, self.customEquation)
+		if numpy is not None:
+			return lambda n: sampler.sampleBlock(generator, n).tolist()
+		return sampler.sampleList
+
+
+def makeVariates(mode, seed, boundedPareto, customEquation, blockSize = DEFAULT_BLOCK_SIZE, rng = None):
+	if mode == 'random':
+		return RandomVariates(seed, boundedPareto, customEquation, rng)
+	elif mode == 'block':
+		return BlockVariates(seed, boundedPareto, customEquation, blockSize)
+	raise ValueError("Unknown variate mode %r, expected one of %s"%(mode, ', '.join(VARIATE_MODES)))
@@ -0,0 +1,129 @@
+#----------------------------------------------------------------------#
+# test_EventCalendar.py
+#
+# Checks of the event calendar's ordering, cancelling, rescheduling and
+# compaction. Run with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import random
+
+import pytest
+
+from EventCalendar import ARRIVAL, COMPACT_MIN, COMPLETION, INJECTION, STOP, EventCalendar
+
+
+def drain(calendar):
+	events = []
+	while len(calendar):
+		time, kind, sequence, data, pending = calendar.pop()
+		events.append((time, kind, data))
+	return events
+
+
+def test_orderByTimeThenKindThenSchedule():
+	calendar = EventCalendar()
+	calendar.schedule(2.0, STOP, 'stop')
+	calendar.schedule(1.0, INJECTION, 'first')
+	calendar.schedule(1.0, COMPLETION, 'done')
+	calendar.schedule(1.0, INJECTION, 'second')
+	calendar.schedule(0.5, ARRIVAL, 'early')
+	assert drain(calendar) == [(0.5, ARRIVAL, 'early'), (1.0, COMPLETION, 'done'), (1.0, INJECTION, 'first'),
+							(1.0, INJECTION, 'second'), (2.0, STOP, 'stop')]
+	with pytest.raises(IndexError):
+		calendar.pop()
+
+
+def test_cancel():
+	calendar = EventCalendar()
+	top = calendar.schedule(1.0, COMPLETION)
+	middle = calendar.schedule(2.0, COMPLETION)
+	calendar.schedule(3.0, STOP)
+	calendar.cancel(middle)
+	assert len(calendar) == 2
+	calendar.cancel(top)			# the top is dropped at once
+	assert len(calendar) == 1 and len(calendar.heap) == 2
+	calendar.cancel(top)			# cancelling twice does nothing
+	calendar.cancel(None)
+	assert calendar.peekTime() == 3.0
+	assert len(calendar.heap) == 1		# peek drops the cancelled entry above it
+	assert drain(calendar) == [(3.0, STOP, None)]
+
+
+def test_cancelAfterPopDoesNothing():
+	calendar = EventCalendar()
+	event = calendar.schedule(1.0, COMPLETION)
+	calendar.schedule(2.0, STOP)
+	assert calendar.pop() is event
+	calendar.cancel(event)
+	assert len(calendar) == 1 and calendar.cancelled == 0
+
+
+def test_reschedule():
+	calendar = EventCalendar()
+	top = calendar.schedule(1.0, COMPLETION, 'a')
+	other = calendar.schedule(5.0, COMPLETION, 'b')
+	calendar.schedule(4.0, STOP)
+
+	moved = calendar.reschedule(top, 6.0, COMPLETION, 'a')		# replaced in place at the top
+	assert not top[4] and len(calendar.heap) == 3 and calendar.cancelled == 0
+	moved = calendar.reschedule(moved, 0.5, COMPLETION, 'a')	# below the top, left behind cancelled
+	assert calendar.cancelled == 1 and len(calendar) == 3
+	calendar.reschedule(other, 4.0, COMPLETION, 'b')
+	assert calendar.reschedule(None, 7.0, INJECTION)[0] == 7.0
+	assert drain(calendar) == [(0.5, COMPLETION, 'a'), (4.0, COMPLETION, 'b'), (4.0, STOP, None), (7.0, INJECTION, None)]
+	assert calendar.cancelled == 0 and calendar.heap == []
+
+
+def test_compactOnceMostAreCancelled():
+	calendar = EventCalendar()
+	calendar.schedule(0.0, STOP)				# keeps the cancelled events off the top
+	events = [calendar.schedule(float(i + 1), COMPLETION, i) for i in range(2*COMPACT_MIN)]
+	for event in events[:COMPACT_MIN]:
+		calendar.cancel(event)
+	assert calendar.cancelled == COMPACT_MIN and len(calendar.heap) == 2*COMPACT_MIN + 1
+
+	# Past COMPACT_MIN and half the heap, the heap is rebuilt
+	calendar.cancel(events[COMPACT_MIN])
+	assert calendar.cancelled == 0
+	assert len(calendar.heap) == len(calendar) == COMPACT_MIN
+	assert [data for time, kind, data in drain(calendar)] == [None] + list(range(COMPACT_MIN + 1, 2*COMPACT_MIN))
+
+
+def test_randomOperationsMatchSortedList():
+	rng = random.Random(3)
+	calendar = EventCalendar()
+	live = {}			# sequence -> event still pending
+	for step in range(5000):
+		choice = rng.random()
+		if choice < 0.4 or not live:
+			event = calendar.schedule(float(rng.randint(0, 50)), rng.choice((COMPLETION, ARRIVAL, INJECTION)))
+			live[event[2]] = event
+		elif choice < 0.6:
+			event = live.pop(rng.choice(list(live)))
+			calendar.cancel(event)
+		elif choice < 0.8:
+			event = live.pop(rng.choice(list(live)))
+			event = calendar.reschedule(event, float(rng.randint(0, 50)), event[1])
+			live[event[2]] = event
+		else:
+			expected = min(live.values(), key = lambda event: event[:3])
+			assert calendar.peek() is expected
+			assert not calendar.before(expected[0], expected[1])
+			assert calendar.pop() is expected
+			del live[expected[2]]
+		assert len(calendar) == len(live)
+		assert calendar.cancelled <= COMPACT_MIN or 2*calendar.cancelled <= len(calendar.heap)
+
+
+def test_before():
+	calendar = EventCalendar()
+	assert calendar.before(10.0, ARRIVAL)		# nothing else pending
+	event = calendar.schedule(1.0, ARRIVAL)
+	assert calendar.before(0.5, STOP)
+	assert calendar.before(1.0, COMPLETION)
+	assert not calendar.before(1.0, ARRIVAL)	# scheduled first
+	assert not calendar.before(1.0, INJECTION)
+	calendar.cancel(event)
+	assert calendar.before(2.0, STOP)
@@ -0,0 +1,160 @@
+#----------------------------------------------------------------------#
+# test_JobQueues.py
+#
+# Checks the job queues against the sorted linked lists they replaced.
+# Run with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import random
+
+import pytest
+
+from JobQueues import ClassBucketQueue, ERPTHeapQueue, ERPTWindow, JobClass, jobName
+
+
+# SRPTE's old LinkedList.insert as a plain list: a job goes in front of
+# the first job whose ERPT is not smaller than its own
+class OldERPTList(object):
+	def __init__(self):
+		self.jobs = []
+
+	def insert(self, job):
+		i = 0
+		while i < len(self.jobs) and job.ERPT > self.jobs[i].ERPT:
+			i += 1
+		self.jobs.insert(i, job)
+
+	def removeHead(self):
+		del self.jobs[0]
+
+
+# The class based LinkedList: insertByClass for classes 1 to
+# numClasses - 1, insertByLCFS for the last class, and the count of
+# jobs per class rebuilt by walking the list
+class OldClassList(object):
+	def __init__(self, numClasses):
+		self.numClasses = numClasses
+		self.jobs = []
+
+	def insert(self, job):
+		i = 0
+		if job.priorityClass == self.numClasses:
+			while i < len(self.jobs) and self.jobs[i].priorityClass != self.numClasses:
+				i += 1
+		else:
+			while i < len(self.jobs) and job.priorityClass >= self.jobs[i].priorityClass and jobName(job) > jobName(self.jobs[i]):
+				i += 1
+		self.jobs.insert(i, job)
+
+	def removeHead(self):
+		del self.jobs[0]
+
+	def countClassesQueued(self):
+		counts = [0] * (self.numClasses + 1)
+		for j in range(1, self.numClasses + 1):
+			for job in self.jobs:
+				if job.priorityClass == j:
+					counts[j] += 1
+				elif job.priorityClass > self.numClasses:
+					counts[self.numClasses] += 1
+		return counts
+
+
+def makeJob(jobID, ERPT):
+	return JobClass(jobID, 0.0, ERPT, 0)
+
+
+def test_ERPTHeapQueueMatchesLinkedList():
+	for seed in range(20):
+		rng = random.Random(seed)
+		queue = ERPTHeapQueue()
+		old = OldERPTList()
+		for jobID in range(300):
+			# Few distinct sizes, so ties are common
+			job = makeJob(jobID, rng.choice((1.0, 2.0, 3.0, 5.0)) if rng.random() < 0.5 else rng.uniform(0.1, 6.0))
+			queue.insert(job)
+			old.insert(job)
+			assert queue.headJob is old.jobs[0]
+			assert queue.Size == len(old.jobs)
+
+			# Serve the head for a while, then maybe finish it
+			head = queue.headJob
+			head.ERPT -= rng.uniform(0.0, head.ERPT)
+			if rng.random() < 0.45:
+				queue.removeHead()
+				old.removeHead()
+				assert queue.headJob is (old.jobs[0] if old.jobs else None)
+				assert queue.Size == len(old.jobs)
+
+		while old.jobs:
+			assert queue.headJob is old.jobs[0]
+			queue.removeHead()
+			old.removeHead()
+		assert queue.headJob is None and queue.Size == 0
+		with pytest.raises(IndexError):
+			queue.removeHead()
+
+
+def test_classBucketQueueMatchesLinkedList():
+	for numClasses in (1, 2, 3, 10):
+		for seed in range(10):
+			rng = random.Random(seed)
+			queue = ClassBucketQueue(numClasses)
+			old = OldClassList(numClasses)
+			counts = queue.countClassesQueued(numClasses)		# live, kept up to date by the queue
+
+			# insertByClass compares names, which only sort in arrival
+			# order up to Job99
+			for jobID in range(100):
+				job = makeJob(jobID, rng.uniform(0.1, 6.0))
+				job.priorityClass = rng.randint(1, numClasses)
+				queue.insert(job)
+				old.insert(job)
+				assert queue.headJob is old.jobs[0]
+				assert counts == old.countClassesQueued()
+				if rng.random() < 0.4:
+					queue.removeHead()
+					old.removeHead()
+					assert queue.headJob is (old.jobs[0] if old.jobs else None)
+					assert counts == old.countClassesQueued()
+				assert queue.Size == len(old.jobs)
+
+			while old.jobs:
+				assert queue.headJob is old.jobs[0]
+				queue.removeHead()
+				old.removeHead()
+				assert counts == old.countClassesQueued()
+			assert queue.countClassesQueued(numClasses) is counts
+			assert counts == [0] * (numClasses + 1)
+
+
+def test_classBucketQueueClearResizesCounts():
+	queue = ClassBucketQueue(3)
+	job = makeJob(0, 1.0)
+	job.priorityClass = 2
+	queue.insert(job)
+	queue.clear(5)
+	assert queue.Size == 0 and queue.headJob is None
+	assert queue.countClassesQueued(5) == [0] * 6
+	with pytest.raises(ValueError):
+		ClassBucketQueue(2, classOrder = 'SJF')
+
+
+def test_ERPTWindowRank():
+	rng = random.Random(7)
+	for size in (0, 1, 4, 9):
+		window = ERPTWindow(size)
+		recent = []
+		for jobID in range(200):
+			job = makeJob(jobID, rng.choice((1.0, 2.0)) if rng.random() < 0.3 else rng.uniform(0.0, 3.0))
+			window.push(job)
+			recent = (recent + [job])[-size:] if size else []
+			if recent and rng.random() < 0.3:
+				served = rng.choice(recent)
+				served.ERPT -= rng.uniform(0.0, 1.0)
+				window.update(served)
+			ERPT = rng.uniform(0.0, 3.0)
+			assert len(window) == len(recent)
+			assert window.rank(ERPT) == sum(1 for other in recent if other.ERPT <= ERPT)
@@ -0,0 +1,138 @@
+#----------------------------------------------------------------------#
+# test_OutputAnalysis.py
+#
+# Checks the t quantiles, MSER truncation and batch means against
+# values known in advance. Run with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import random
+
+import pytest
+
+from OutputAnalysis import BatchMeans, ClassTimeAverage, confidenceInterval, mserTruncation, tQuantile
+
+
+def test_tQuantileMatchesTables():
+	table = {(0.975, 1) : 12.706204736,
+			(0.975, 2) : 4.302652730,
+			(0.975, 10) : 2.228138852,
+			(0.995, 29) : 2.756385904,
+			(0.95, 5) : 2.015048373,
+			(0.975, None) : 1.959963985}
+	for (p, df), t in table.items():
+		assert tQuantile(p, df) == pytest.approx(t, abs = 1e-9)
+	assert tQuantile(0.025, 4) == pytest.approx(-2.776445105, abs = 1e-9)
+	assert tQuantile(0.5, 3) == pytest.approx(0.0, abs = 1e-12)
+	with pytest.raises(ValueError):
+		tQuantile(1.0, 5)
+	with pytest.raises(ValueError):
+		tQuantile(0.9, 0)
+
+
+def test_confidenceInterval():
+	interval = confidenceInterval([1, 2, 3, 4, 5])
+	assert interval['n'] == 5
+	assert interval['mean'] == 3.0
+	assert interval['variance'] == 2.5
+	assert interval['halfWidth'] == pytest.approx(2.776445105*(0.5**0.5), abs = 1e-9)
+	assert interval['low'] == pytest.approx(3.0 - interval['halfWidth'])
+
+
+def test_mserTruncation():
+	# 50 observations of warm-up before a steady alternation
+	assert mserTruncation([100.0]*50 + [0.0, 2.0]*225, 5) == 50
+	assert mserTruncation([3.0]*100, 5) == 0
+	assert mserTruncation([1.0, 2.0, 3.0], 5) == 0			# fewer than two groups
+	# A trend never settles, so the most that may go (half) is deleted
+	assert mserTruncation([float(i) for i in range(100)], 5) == 50
+
+
+# Records a step function from start to end that is 1 for the first
+# half of every 100 time units and 3 for the second half (time average 2)
+def recordSquareWave(batchMeans, start, end):
+	time = start
+	while time < end:
+		batchMeans.record(time, 1.0)
+		batchMeans.record(time + 50.0, 3.0)
+		time += 100.0
+	batchMeans.record(end, 1.0)
+
+
+def test_batchMeansOfSquareWave():
+	batchMeans = BatchMeans(batchLength = 100.0, maxBatches = 400, numBatches = 20)
+	recordSquareWave(batchMeans, 0.0, 19900.0)
+	assert batchMeans.estimate() is None		# 199 batches, fewer than 10*numBatches
+	recordSquareWave(batchMeans, 19900.0, 25000.0)
+	assert len(batchMeans.batches) == 250
+	assert set(batchMeans.batches) == set([2.0])
+
+	estimate = batchMeans.estimate()
+	assert estimate['mean'] == 2.0
+	assert estimate['halfWidth'] == 0.0
+	assert estimate['n'] == 20
+	assert estimate['batchLength'] == 1200.0			# 250//20 batches of 100 each
+	assert estimate['warmUpTime'] == 1000.0			# the 10 oldest left over
+
+
+def test_batchMeansMergeKeepsMean():
+	batchMeans = BatchMeans(batchLength = 100.0, maxBatches = 200, numBatches = 10)
+	recordSquareWave(batchMeans, 0.0, 25000.0)
+	assert batchMeans.batchLength == 200.0
+	assert len(batchMeans.batches) == 125				# 100 merged + 25 of the new length
+	assert set(batchMeans.batches) == set([2.0])
+	assert batchMeans.estimate()['mean'] == 2.0
+
+
+def test_batchMeansEstimateSurvivesMerge():
+	# At the smallest maxBatches allowed, the first merge leaves exactly
+	# the 10*numBatches batches an estimate needs
+	batchMeans = BatchMeans(batchLength = 100.0, maxBatches = 200, numBatches = 10)
+	recordSquareWave(batchMeans, 0.0, 19900.0)
+	assert len(batchMeans.batches) == 199 and batchMeans.estimate() is not None
+	recordSquareWave(batchMeans, 19900.0, 20000.0)
+	assert len(batchMeans.batches) == 100 and batchMeans.batchLength == 200.0
+	assert batchMeans.estimate()['mean'] == 2.0
+
+	BatchMeans(maxBatches = 400, numBatches = 20)
+	for maxBatches in (398, 399, 401):
+		with pytest.raises(ValueError):
+			BatchMeans(maxBatches = maxBatches, numBatches = 20)
+
+
+def test_batchMeansDeletesWarmUp():
+	batchMeans = BatchMeans(batchLength = 100.0, maxBatches = 400, numBatches = 20)
+	batchMeans.record(0.0, 10.0)			# 2000 time units of warm-up at 10
+	recordSquareWave(batchMeans, 2000.0, 30000.0)
+	estimate = batchMeans.estimate()
+	assert estimate['warmUpTime'] == 2000.0
+	assert estimate['mean'] == 2.0
+	assert estimate['halfWidth'] == 0.0
+
+
+def test_batchMeansTarget():
+	rng = random.Random(11)
+	batchMeans = BatchMeans(batchLength = 10.0, numBatches = 20, targetPrecision = 0.02)
+	time = 0.0
+	while not batchMeans.converged:
+		batchMeans.record(time, rng.uniform(1.0, 3.0))
+		time += rng.expovariate(1.0)
+		assert time < 1e6, "batch means never converged"
+	estimate = batchMeans.estimate()
+	assert estimate['halfWidth'] <= 0.02*estimate['mean']
+	assert estimate['low'] <= 2.0 <= estimate['high']
+
+	with pytest.raises(ValueError):
+		BatchMeans(numBatches = 20, maxBatches = 100)
+
+
+def test_classTimeAverage():
+	average = ClassTimeAverage(3)
+	changes = [(1.0, 1, 1), (2.0, 2, 1), (2.0, 1, 1), (4.0, 1, -2), (5.0, 3, 1)]
+	for time, priorityClass, delta in changes:
+		average.change(priorityClass, delta)
+		average.record(time)
+	# Class 1: 1 job on [1,2), 2 on [2,4); class 2: 1 on [2,10); class 3: 1 on [5,10)
+	assert average.means(10.0) == [0.0, 0.5, 0.8, 0.5]
+	assert average.means(0.0) == [0.0, 0.0, 1.0, 1.0]
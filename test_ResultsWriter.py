@@ -0,0 +1,212 @@
+#----------------------------------------------------------------------#
+# test_ResultsWriter.py
+#
+# Checks that the buffered results files hold exactly the bytes the old
+# open/append/close per event wrote, also when a run is stopped or
+# fails part way, and that binary traces read back what was written.
+# Run with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import os
+
+import pytest
+
+from ResultsWriter import ResultsWriter, TraceWriter, convertTextTrace, loadTrace, npyLength, tracePath
+from SimEngine import ClassBasedMachine, SRPTEMachine
+from SimParams import OutputOptions, Scenario
+
+
+# What saveNumJobs and saveAvgNumJobs used to do on every event
+def appendRow(path, time, value):
+	text = "%f,%f"%(time, value) + "\n"
+	with open(path, "a") as myFile:
+		myFile.write(text)
+
+
+class OldAppends(object):
+	def saveNumJobs(self, load, time, numJobs):
+		appendRow(self.numPath, time, numJobs)
+
+	def saveAvgNumJobs(self, load, time, avgNumJobs):
+		appendRow(self.avgPath, time, avgNumJobs)
+
+
+class AppendingSRPTEMachine(OldAppends, SRPTEMachine):
+	pass
+
+
+class AppendingClassBasedMachine(OldAppends, ClassBasedMachine):
+	pass
+
+
+# Contents of every file under folder, by path relative to it
+def readTree(folder):
+	files = {}
+	for root, folders, names in os.walk(folder):
+		for name in names:
+			path = os.path.join(root, name)
+			with open(path, 'rb') as myFile:
+				files[os.path.relpath(path, folder)] = myFile.read()
+	return files
+
+
+# Runs a seeded machine writing its results under folder. After
+# `completions` completions the run is stopped (as by the GUI's STOP
+# button) or, with fail, interrupted by an exception.
+def runMachine(Machine, folder, flushSize = 10000, completions = None, fail = False, resultsFormat = 'text'):
+	os.makedirs(folder)		# the old appends expect the folders to exist
+	os.makedirs(os.path.join(folder, Machine.resultsFolder))
+	MC = Machine(Scenario(procDist = 'Exponential', percErrorMin = -20, percErrorMax = 20),
+				OutputOptions(saveResults = True, resultsDir = folder, resultsFormat = resultsFormat, flushSize = flushSize))
+	if completions is not None:
+		completionEvent = MC.completionEvent
+		count = [0]
+		def stopAfter(*args):
+			completionEvent(*args)
+			count[0] += 1
+			if count[0] == completions:
+				if fail:
+					raise RuntimeError("run failed")
+				MC.stopSimulation()
+		MC.completionEvent = stopAfter
+
+	args = (0.9, 'Exponential', 0.5, 'Exponential', -20, 20)
+	if issubclass(Machine, ClassBasedMachine):
+		args += (3,)
+	return MC.run(*(args + (2000.0,)))
+
+
+def test_writerMatchesAppends(tmp_path):
+	rows = [(0.1*i, i % 7) for i in range(2500)]
+	for flushSize in (1, 3, 1000, 10000):
+		folder = tmp_path/("flush%d"%flushSize)
+		for part in ("old", "new"):
+			os.makedirs(folder/part)
+			for name in ("a.txt", "b.txt"):		# existing results are appended to
+				(folder/part/name).write_text("0.000000,1.000000\n")
+
+		with ResultsWriter(flushSize) as writer:
+			for time, value in rows:
+				name = "a.txt" if value % 2 else "b.txt"
+				appendRow(str(folder/"old"/name), time, value)
+				writer.writeRow(str(folder/"new"/name), time, value)
+		assert readTree(folder/"old") == readTree(folder/"new")
+
+
+def test_writerFlushesOnException(tmp_path):
+	path = str(tmp_path/"Num.txt")
+	with pytest.raises(RuntimeError):
+		with ResultsWriter(1000) as writer:
+			for i in range(10):
+				writer.writeRow(path, float(i), i)
+			raise RuntimeError("run failed")
+	with open(path) as myFile:
+		assert myFile.read() == "".join("%f,%f\n"%(float(i), i) for i in range(10))
+	with pytest.raises(ValueError):
+		ResultsWriter(0)
+
+
+@pytest.mark.parametrize('Machine, Appending', [(SRPTEMachine, AppendingSRPTEMachine),
+												(ClassBasedMachine, AppendingClassBasedMachine)])
+def test_machineResultsMatchAppends(tmp_path, Machine, Appending):
+	runMachine(Appending, str(tmp_path/"old"))
+	old = readTree(tmp_path/"old")
+	assert len(old) == 2 and all(old.values())
+	for flushSize in (1, 7, 10000):
+		runMachine(Machine, str(tmp_path/("new%d"%flushSize)), flushSize)
+		assert readTree(tmp_path/("new%d"%flushSize)) == old
+
+
+@pytest.mark.parametrize('Machine, Appending', [(SRPTEMachine, AppendingSRPTEMachine),
+												(ClassBasedMachine, AppendingClassBasedMachine)])
+def test_machineFlushesWhenStopped(tmp_path, Machine, Appending):
+	results = runMachine(Appending, str(tmp_path/"old"), completions = 50)
+	assert results['numCompleted'] == 50
+	runMachine(Machine, str(tmp_path/"new"), completions = 50)
+	assert readTree(tmp_path/"new") == readTree(tmp_path/"old")
+
+
+@pytest.mark.parametrize('Machine, Appending', [(SRPTEMachine, AppendingSRPTEMachine),
+												(ClassBasedMachine, AppendingClassBasedMachine)])
+def test_machineFlushesOnException(tmp_path, Machine, Appending):
+	with pytest.raises(RuntimeError):
+		runMachine(Appending, str(tmp_path/"old"), completions = 50, fail = True)
+	with pytest.raises(RuntimeError):
+		runMachine(Machine, str(tmp_path/"new"), completions = 50, fail = True)
+	old = readTree(tmp_path/"old")
+	assert all(old.values())
+	assert readTree(tmp_path/"new") == old
+
+
+# Time and value columns of a trace as lists of floats
+def loadColumns(base, memoryMap = True):
+	return [[float(value) for value in column] for column in loadTrace(base, memoryMap)]
+
+
+def test_traceRoundTrip(tmp_path):
+	base = str(tmp_path/"traces"/"Num")
+	rows = [(0.5*i, float(i % 5)) for i in range(100)]
+	writer = TraceWriter(7)
+	for time, value in rows[:50]:
+		writer.writeRow(base, time, value)
+	assert loadColumns(base, False) == [[0.5*i for i in range(49)], [float(i % 5) for i in range(49)]]	# readable up to the last flush
+	writer.close()
+	assert npyLength(tracePath(base, 'time')) == 50
+
+	# A later run appends, as to the text files
+	with TraceWriter(1000) as writer:
+		for time, value in rows[50:]:
+			writer.writeRow(base, time, value)
+	expected = [[time for time, value in rows], [value for time, value in rows]]
+	assert loadColumns(base) == expected
+	assert loadColumns(base, False) == expected
+
+
+def test_traceDropsPartialChunk(tmp_path):
+	base = str(tmp_path/"Num")
+	with TraceWriter(4) as writer:
+		for i in range(8):
+			writer.writeRow(base, float(i), float(-i))
+	for column in ('time', 'value'):
+		with open(tracePath(base, column), 'ab') as myFile:
+			myFile.write(b'\x00'*12)				# rows of an interrupted chunk
+	with TraceWriter(4) as writer:
+		writer.writeRow(base, 8.0, -8.0)
+	assert loadColumns(base) == [[float(i) for i in range(9)], [float(-i) for i in range(9)]]
+
+
+def test_emptyTrace(tmp_path):
+	base = str(tmp_path/"Num")
+	writer = TraceWriter()
+	writer.openPath(base)
+	writer.close()
+	assert loadColumns(base) == [[], []]
+
+
+def test_convertTextTrace(tmp_path):
+	path = str(tmp_path/"SRPT_Num_load=90_alpha=1.5_servers=1.txt")
+	rows = [(0.123456789*i, i*1.5) for i in range(300)]
+	with ResultsWriter(50) as writer:
+		for time, value in rows:
+			writer.writeRow(path, time, value)
+	base = convertTextTrace(path, flushSize = 64)
+	assert base == path[:-len(".txt")]
+	assert loadColumns(base) == [[float("%f"%time) for time, value in rows], [float("%f"%value) for time, value in rows]]
+
+	with open(path, 'w') as myFile:
+		myFile.write("not a trace\n")
+	with pytest.raises(ValueError):
+		npyLength(path)
+
+
+def test_machineTraceMatchesText(tmp_path):
+	runMachine(SRPTEMachine, str(tmp_path/"text"))
+	runMachine(SRPTEMachine, str(tmp_path/"npy"), resultsFormat = 'npy')
+	for kind in ("Num", "Avg"):
+		name = os.path.join("SRPT", "SRPT_%s_load=90_alpha=1.5_servers=1"%kind)
+		textBase = convertTextTrace(str(tmp_path/"text"/name) + ".txt")
+		times, values = loadColumns(str(tmp_path/"npy"/name))
+		assert len(times) > 100
+		assert loadColumns(textBase) == [[float("%f"%time) for time in times], [float("%f"%value) for value in values]]
@@ -0,0 +1,108 @@
+#----------------------------------------------------------------------#
+# test_SimEngine.py
+#
+# Checks that runSimulation reproduces a seeded run of the GUI machines
+# (results and results files), that bad scenarios are rejected before a
+# run starts, and the parameter records. The GUI comparison needs
+# tkinter importable, but no display. Run with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import os
+import random
+
+import pytest
+
+from SimEngine import SEED, runSimulation
+from SimParams import AnalysisOptions, OutputOptions, Scenario, makeParams
+
+BP_ARRAY = [1.5, 1.0, 1000.0]
+CUSTOM_EQUATION = "-log(1 - random.uniform(0.0, 1.0))/procRate"
+
+
+# Stands in for the GUI window the MachineClass reads its options from
+class FakeWindow(object):
+	def __init__(self):
+		self.rng = random.Random(SEED)
+		self.BPArray = list(BP_ARRAY)
+		self.customEquation = CUSTOM_EQUATION
+		self.logLevel = 'debug'
+		self.profile = False
+		self.lines = []
+
+	def writeToConsole(self, text = ' '):
+		self.lines.append(text)
+
+	def setProgress(self, report):
+		pass
+
+
+def readTree(folder):
+	files = {}
+	for root, folders, names in os.walk(folder):
+		for name in names:
+			path = os.path.join(root, name)
+			with open(path, 'rb') as myFile:
+				files[os.path.relpath(path, folder)] = myFile.read()
+	return files
+
+
+@pytest.mark.parametrize('module, scheduler', [('SRPTE', 'SRPTE'), ('ClassBased_SingleServer', 'Class')])
+@pytest.mark.parametrize('procDist', ['Exponential', 'Bounded Pareto', 'Custom'])
+def test_runSimulationMatchesGUI(tmp_path, monkeypatch, module, scheduler, procDist):
+	pytest.importorskip('tkinter')
+	GUI = pytest.importorskip(module)
+	monkeypatch.chdir(tmp_path)			# the GUI writes under ./SINGLE_SERVER_RESULTS
+
+	window = FakeWindow()
+	args = (0.8, 'Exponential', 0.5, procDist, -20, 30)
+	if scheduler == 'Class':
+		args += (4,)
+	guiResults = GUI.MachineClass(window).run(*(args + (3000.0,)))
+	assert window.lines
+
+	lines = []
+	scenario = Scenario(scheduler, 0.8, 'Exponential', 0.5, procDist, -20, 30, 4, 3000.0, seed = SEED,
+						alpha = BP_ARRAY[0], lower = BP_ARRAY[1], upper = BP_ARRAY[2], customEquation = CUSTOM_EQUATION,
+						variates = 'random')
+	output = OutputOptions(saveResults = True, resultsDir = str(tmp_path/"engine"), tracePolicy = 'minmax',
+							traceInterval = 1.0, traceMaxPoints = 20000, console = lines.append)
+	assert runSimulation(scenario, output) == guiResults
+	assert lines == window.lines
+	assert readTree(tmp_path/"engine") == readTree(tmp_path/"SINGLE_SERVER_RESULTS")
+
+
+def test_runSimulationIsReproducible():
+	for variates in ('random', 'block'):
+		scenario = Scenario('Class', 0.9, procDist = 'Exponential', numClasses = 3, simLength = 30000.0, variates = variates)
+		first = runSimulation(scenario, analysis = AnalysisOptions(batchMeans = True))
+		assert first['steadyNumJobsLow'] <= first['steadyNumJobs'] <= first['steadyNumJobsHigh']
+		assert runSimulation(scenario, analysis = AnalysisOptions(batchMeans = True)) == first
+		assert runSimulation(scenario._replace(seed = SEED + 1), analysis = AnalysisOptions(batchMeans = True)) != first
+
+
+def test_runSimulationRejectsBadScenario():
+	bad = [Scenario(scheduler = 'FIFO'),
+			Scenario(procDist = 'Normal'),
+			Scenario(procDist = 'Custom', customEquation = "__import__('os')"),
+			Scenario(load = 0.0),
+			Scenario(simLength = -1.0),
+			Scenario(scheduler = 'Class', numClasses = 0)]
+	for scenario in bad:
+		with pytest.raises(ValueError):
+			runSimulation(scenario)
+	with pytest.raises(ValueError):
+		runSimulation(Scenario(simLength = 10.0), OutputOptions(tracePolicy = 'all points'))
+
+
+def test_makeParams():
+	scenario, output, analysis = makeParams(load = 0.5, scheduler = 'Class', tracePolicy = 'none', targetPrecision = 0.01)
+	assert scenario == Scenario(scheduler = 'Class', load = 0.5)
+	assert output == OutputOptions(tracePolicy = 'none')
+	assert analysis == AnalysisOptions(targetPrecision = 0.01)
+	assert makeParams() == (Scenario(), OutputOptions(), AnalysisOptions())
+	with pytest.raises(TypeError):
+		makeParams(load = 0.5, servers = 2)
+	assert not set(Scenario._fields) & set(OutputOptions._fields)
+	assert not set(OutputOptions._fields) & set(AnalysisOptions._fields)
@@ -0,0 +1,61 @@
+#----------------------------------------------------------------------#
+# test_TraceRecorder.py
+#
+# Checks of the bounded trace recorders. Run with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+from TraceRecorder import EventTrace, GridTrace, makeTraceRecorder
+
+
+# Records samples every step from start to end; the value of each
+# sample is its own time, so a grid point's value shows which sample
+# it was taken from
+def recordSteps(trace, start, end, step):
+	time = start
+	recorded = []
+	while time < end:
+		trace.record(time, time, -time)
+		recorded.append(time)
+		time += step
+	return recorded
+
+
+def test_gridTraceEvenlySpacedAfterThinning():
+	for start in (0.0, 0.3, 1.0, 1.7, 2.5, 5.2):
+		trace = GridTrace(2, 1.0, 10)
+		recorded = recordSteps(trace, start, 1000.0, 0.37)
+		times, (values, negatives) = trace.arrays()
+		assert trace.interval == 128.0
+		assert len(times) <= 10
+		for time in times:
+			assert time % trace.interval == 0.0
+		assert set(b - a for a, b in zip(times, times[1:])) == set([trace.interval])
+		for time, value, negative in zip(times, values, negatives):
+			assert value == max(sample for sample in recorded if sample <= time)
+			assert negative == -value
+
+
+def test_gridTraceWithoutCap():
+	trace = GridTrace(2, 0.5)
+	recordSteps(trace, 0.2, 10.0, 0.3)
+	times, columns = trace.arrays()
+	assert times == [0.5*i for i in range(1, 20)]
+
+
+def test_eventTraceThinning():
+	trace = EventTrace(1, 1, 8)
+	for i in range(100):
+		trace.record(float(i), i)
+	times, (values,) = trace.arrays()
+	assert len(times) <= 8
+	assert values == [i*trace.every for i in range(len(values))]
+
+
+def test_allTraceIgnoresCap():
+	trace = makeTraceRecorder('all', maxPoints = 10)
+	recorded = recordSteps(trace, 0.0, 100.0, 1.0)
+	times, columns = trace.arrays()
+	assert times == recorded
+	assert makeTraceRecorder('every', every = 1, maxPoints = 10).maxPoints == 10
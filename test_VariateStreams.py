@@ -0,0 +1,69 @@
+#----------------------------------------------------------------------#
+# test_VariateStreams.py
+#
+# Checks that custom distributions compile to the same values eval gave
+# and that anything outside the arithmetic whitelist is rejected. Run
+# with python -m pytest.
+#
+# Rachel Mailach
+#----------------------------------------------------------------------#
+
+import math
+
+import pytest
+
+from VariateStreams import compileEquation
+
+
+def test_equationMatchesEval():
+	# Each equation with its uniform draws written in terms of x
+	equations = {"-log(1 - random.uniform(0.0, 1.0))/procRate" : "-log(1 - x)/procRate",
+				"-log(1 - random.random())/procRate" : "-log(1 - x)/procRate",
+				"sqrt(x)*exp(-procRate) + pi - e" : "sqrt(x)*exp(-procRate) + pi - e",
+				"(x + 2)**2/-3 + +x" : "(x + 2)**2/-3 + +x",
+				"random.uniform(2, 5)*procRate" : "(2 + 3*x)*procRate"}
+	for equation, inTermsOfX in equations.items():
+		function = compileEquation(equation)
+		for x in (0.0, 0.25, 0.5, 0.999):
+			expected = eval(inTermsOfX, {'x' : x, 'procRate' : 0.5, 'log' : math.log, 'exp' : math.exp,
+										'sqrt' : math.sqrt, 'pi' : math.pi, 'e' : math.e})
+			assert function(x, 0.5) == pytest.approx(expected, rel = 1e-15)
+
+
+@pytest.mark.parametrize('equation', [
+	"os",									# names outside x, procRate, pi and e
+	"__builtins__",
+	"y + 1",
+	"x.real",								# attributes
+	"(1).__class__",
+	"random.seed",
+	"procRate.__class__.__mro__",
+	"__import__('os').system('true')",		# calls outside log/exp/sqrt/random
+	"abs(x)",
+	"eval('1')",
+	"math.log(x)",
+	"random.seed(1)",
+	"random.uniform(0, x)",					# bounds must be constants
+	"log(x, 2)",
+	"log(x=1)",
+	"'text'",								# anything but numbers and arithmetic
+	"True + x",
+	"[x][0]",
+	"x if x else 1",
+	"lambda: 1",
+	"x < 1",
+	"x // 2",
+	"x % 2",
+	"x & 1",
+	"(x := 1)",
+	"1 +",
+	""])
+def test_equationOutsideWhitelistRejected(equation):
+	with pytest.raises(ValueError):
+		compileEquation(equation)
+
+
+def test_equationHasNoBuiltins():
+	function = compileEquation("x*procRate")
+	assert function.__globals__['__builtins__'] == {}
+	assert set(function.__globals__) == set(['__builtins__', 'log', 'exp', 'sqrt'])